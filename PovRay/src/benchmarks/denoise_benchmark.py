@@ -0,0 +1,77 @@
+import time
+import numpy as np
+
+from povview.parser import Parser
+from povview.tracer import Tracer
+from povview.denoise import denoise
+
+SIZE = (320, 240)
+FULL_HD = (1920, 1080)
+
+
+def psnr(image, reference):
+    """Peak signal to noise ratio, in dB, of radiances clipped to [0, 1]."""
+    error = np.mean((np.clip(image, 0, 1) - np.clip(reference, 0, 1)) ** 2)
+    return 10 * np.log10(1 / error) if error else np.inf
+
+
+def path_trace(parsed_file, samples, denoised):
+    tracer = Tracer(
+        parsed_file["lights"],
+        parsed_file["cameras"][0],
+        parsed_file["objects"],
+        SIZE,
+        model="path_tracer",
+        pass_samples=samples,
+    )
+    result = tracer.trace_scene(target_error=None, denoise=denoised)
+    return tracer, result
+
+
+def main(args):
+    """
+    Path traces a scene at a few sample counts, denoises every render and
+    prints its PSNR against a high sample count reference, with and without
+    the denoiser, and the time each took. Then times the denoiser alone on a
+    1080p frame.
+
+    Usage: python -m benchmarks.denoise_benchmark scene.pov [reference spp] [spp ...]
+    """
+    parsed_file = Parser().parse(args[1])
+    reference_samples = int(args[2]) if len(args) > 2 else 1024
+    sample_counts = [int(arg) for arg in args[3:]] or [2, 4, 8, 16]
+
+    reference, _ = path_trace(parsed_file, reference_samples, False)
+
+    print(f"{'spp':>6} {'render':>9} {'denoise':>9} {'noisy':>9} {'denoised':>9}")
+    for samples in sample_counts:
+        tracer, result = path_trace(parsed_file, samples, True)
+        print(
+            f"{samples:>6} {result.elapsed:>8.2f}s "
+            f"{result.stats['denoise_time']:>8.2f}s "
+            f"{psnr(tracer.radiance, reference.radiance):>7.2f}dB "
+            f"{psnr(tracer.denoised, reference.radiance):>7.2f}dB"
+        )
+
+    # The last render, tiled up to 1080p
+    w, h = FULL_HD
+    reps = (-(-h // SIZE[1]), -(-w // SIZE[0]), 1)
+    full = {
+        name: np.tile(plane if plane.ndim == 3 else plane[..., None], reps)[:h, :w]
+        for name, plane in [
+            ("radiance", tracer.radiance),
+            ("variance", tracer.variance),
+            *tracer.denoise_guides.items(),
+        ]
+    }
+    full["depth"] = full["depth"][..., 0]
+
+    start = time.perf_counter()
+    denoise(**full)
+    print(f"denoise {w}x{h}: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
@@ -0,0 +1,56 @@
+import numpy as np
+
+from povview.parser import Parser
+from povview.tracer import Tracer
+
+SIZE = (160, 120)
+
+
+def path_trace(parsed_file, samples, sort_rays):
+    tracer = Tracer(
+        parsed_file["lights"],
+        parsed_file["cameras"][0],
+        parsed_file["objects"],
+        SIZE,
+        model="path_tracer",
+        pass_samples=samples,
+        sort_rays=sort_rays,
+    )
+    result = tracer.trace_scene(target_error=None)
+    return tracer.radiance, result
+
+
+def main(args):
+    """
+    Path traces a scene with and without sorting the rays of the bounces
+    and prints, for each, the render time, the rays traced per second, the
+    BVH nodes visited per ray and the packet steps (node tests over a whole
+    packet) per ray. Both renders must be the same image.
+
+    Usage: python -m benchmarks.ray_sort_benchmark scene.pov [spp]
+    """
+    parsed_file = Parser().parse(args[1])
+    samples = int(args[2]) if len(args) > 2 else 8
+
+    print(
+        f"{'sorted':>8} {'time':>9} {'rays/s':>10} {'nodes/ray':>10} {'steps/ray':>10}"
+    )
+    images = []
+    for sort_rays in (False, True):
+        radiance, result = path_trace(parsed_file, samples, sort_rays)
+        stats = result.stats
+        print(
+            f"{str(sort_rays):>8} {result.elapsed:>8.2f}s "
+            f"{stats['rays'] / result.elapsed:>10.0f} "
+            f"{stats['visits'] / stats['rays']:>10.2f} "
+            f"{stats['steps'] / stats['rays']:>10.4f}"
+        )
+        images.append(radiance)
+
+    print(f"same image: {np.array_equal(*images)}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
@@ -0,0 +1,55 @@
+import numpy as np
+
+from povview.parser import Parser
+from povview.tracer import Tracer, SAMPLERS
+
+SIZE = (160, 120)
+
+
+def rmse(image, reference):
+    return float(np.sqrt(np.mean((image - reference) ** 2)))
+
+
+def path_trace(parsed_file, samples, sampler, seed=0):
+    tracer = Tracer(
+        parsed_file["lights"],
+        parsed_file["cameras"][0],
+        parsed_file["objects"],
+        SIZE,
+        model="path_tracer",
+        pass_samples=samples,
+        sampler=sampler,
+        seed=seed,
+    )
+    result = tracer.trace_scene(target_error=None)
+    return tracer.radiance, result.elapsed
+
+
+def main(args):
+    """
+    Path traces a scene at increasing sample counts with every sampler and
+    prints the RMSE of each render against a high sample count reference,
+    with the time it took.
+
+    Usage: python -m benchmarks.sampler_benchmark scene.pov [reference spp] [spp ...]
+    """
+    parsed_file = Parser().parse(args[1])
+    reference_samples = int(args[2]) if len(args) > 2 else 1024
+    sample_counts = [int(arg) for arg in args[3:]] or [1, 2, 4, 8, 16, 32]
+
+    # Another seed, or the reference would share the noise of the renders
+    reference, _ = path_trace(parsed_file, reference_samples, "sobol", seed=1)
+
+    print(f"{'spp':>6}" + "".join(f"{name:>20}" for name in SAMPLERS))
+    for samples in sample_counts:
+        row = f"{samples:>6}"
+        for sampler in SAMPLERS:
+            radiance, elapsed = path_trace(parsed_file, samples, sampler)
+            row += f"{rmse(radiance, reference):>11.4f} {elapsed:>7.2f}s"
+        print(row)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
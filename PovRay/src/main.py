@@ -1,15 +1,20 @@
 import gi
+import time
+import threading
+import multiprocessing
+from PIL import Image
 
 gi.require_version("Gtk", "3.0")
 from povview.utils.utils import setup_goocanvas
 
 setup_goocanvas()
-from gi.repository import Gtk, GooCanvas
+from gi.repository import Gtk, GooCanvas, GLib
 
 from lib.main_menu import Main_menu
 from povview.elements.objects.cone import Cone
 from povview.elements.objects.ovus import Ovus
 from povview.parser import Parser
+from povview.render import CancellationToken
 from povview.tracer import Tracer
 
 
@@ -40,6 +45,13 @@ COLORS = {
     "Purple": (1, 0, 1),
 }
 
+# Maximum number of times per second the Tracer view is redrawn while rendering
+TRACE_REFRESH_RATE = 4
+
+# Render workers are started fresh: forking a process that runs GTK and
+# render threads can deadlock the children on a lock held by another thread
+RENDER_START_METHOD = "spawn"
+
 
 class Views(Gtk.Grid):
     def __init__(self):
@@ -47,6 +59,9 @@ class Views(Gtk.Grid):
 
         self.objs = []
 
+        self.render_thread = None
+        self.render_token = None
+
         self.views = {}
         for x, y, lbl in [(0, 0, "xy"), (1, 0, "zy"), (0, 1, "zx"), (1, 1, "Tracer")]:
             frame = Gtk.Frame(label=lbl, label_xalign=0.04, hexpand=True, vexpand=True)
@@ -84,9 +99,12 @@ class Views(Gtk.Grid):
 
     def clear_views(self):
         for view in self.views:
-            root = self.views[view]["canvas"].get_root_item()
-            for i in range(root.get_n_children() - 1, -1, -1):
-                root.get_child(i).remove()
+            self.clear_view(view)
+
+    def clear_view(self, view):
+        root = self.views[view]["canvas"].get_root_item()
+        for i in range(root.get_n_children() - 1, -1, -1):
+            root.get_child(i).remove()
 
     def full_clear_views(self):
         for view in self.views:
@@ -107,18 +125,95 @@ class Views(Gtk.Grid):
         for obj in self.objs:
             obj.draw_on(self.views)
 
-    def trace(self, tracer):
-        if not len(self.objs):
-            return
+    @property
+    def tracing(self):
+        return self.render_thread is not None and self.render_thread.is_alive()
+
+    def trace(self, tracer, on_progress=None, on_finished=None):
+        """
+        Starts rendering in a background thread so that the main loop keeps
+        running. Returns False if there is nothing to trace or a render is
+        already going on.
+        """
+        if not len(self.objs) or self.tracing:
+            return False
+
+        self.render_token = CancellationToken(
+            context=multiprocessing.get_context(RENDER_START_METHOD)
+        )
+        self.render_thread = threading.Thread(
+            target=self.render,
+            args=(tracer, self.render_token, on_progress, on_finished),
+            daemon=True,
+        )
+        self.render_thread.start()
+
+        return True
+
+    def cancel_trace(self):
+        if self.render_token is not None:
+            self.render_token.cancel()
+
+    def render(self, tracer, token, on_progress, on_finished):
+        """
+        Body of the render thread. Finished tiles are shown at most
+        TRACE_REFRESH_RATE times per second; everything touching GTK is
+        handed to the main loop with GLib.idle_add.
+        """
+        last_refresh = 0
+
+        def on_tile(tile, done, total, image):
+            nonlocal last_refresh
+
+            now = time.monotonic()
+            if now - last_refresh < 1 / TRACE_REFRESH_RATE and done < total:
+                return
+            last_refresh = now
+
+            GLib.idle_add(
+                self.show_trace,
+                tracer,
+                Image.fromarray(image.copy(), "RGB"),
+                done / total,
+                on_progress,
+            )
+
+        try:
+            tracer.trace_scene(
+                on_tile=on_tile,
+                token=token,
+                mp_context=multiprocessing.get_context(RENDER_START_METHOD),
+            )
+        finally:
+            GLib.idle_add(self.finish_trace, tracer, on_finished)
 
-        tracer.trace_scene()
-        tracer.draw_on(self.views, (self.frame_width, self.frame_height))
+    def show_trace(self, tracer, image, fraction, on_progress):
+        self.clear_view("Tracer")
+        tracer.draw_on(self.views, (self.frame_width, self.frame_height), image)
+
+        if on_progress is not None:
+            on_progress(fraction)
+
+        return GLib.SOURCE_REMOVE
+
+    def finish_trace(self, tracer, on_finished):
+        """Shows the final image, or the best one reached if the render stopped."""
+        result = tracer.render_result
+
+        if result is not None and result.image is not None:
+            self.clear_view("Tracer")
+            tracer.draw_on(self.views, (self.frame_width, self.frame_height))
+
+        if on_finished is not None:
+            on_finished(result)
+
+        return GLib.SOURCE_REMOVE
 
 
 class MainWindow(Gtk.Window):
     def __init__(self):
         super(MainWindow, self).__init__()
-        self.connect("destroy", lambda x: Gtk.main_quit())
+        self.connect("destroy", self.on_quit_clicked)
         self.set_default_size(800, 600)
 
         mm = self.make_main_menu()
@@ -173,6 +268,14 @@ class MainWindow(Gtk.Window):
         self.trace_button.set_hexpand(False)
         self.trace_button.set_vexpand(False)
 
+        # --- Render Progress and Cancel Button ---
+        self.trace_progress = Gtk.ProgressBar(show_text=True)
+        self.trace_progress.set_valign(Gtk.Align.CENTER)
+
+        self.cancel_button = Gtk.Button(label="Cancel")
+        self.cancel_button.connect("clicked", self.on_cancel_button_clicked)
+        self.cancel_button.set_sensitive(False)
+
         # --- ComboBox de Presets de Resolución ---
         presets_label = Gtk.Label(label="Presets")
         presets_label.set_xalign(0)
@@ -210,6 +313,8 @@ class MainWindow(Gtk.Window):
         size_box.pack_start(render_mode_label, False, False, 0)
         size_box.pack_start(self.render_mode_combobox, False, False, 0)
         size_box.pack_start(self.trace_button, False, False, 0)
+        size_box.pack_start(self.trace_progress, False, False, 0)
+        size_box.pack_start(self.cancel_button, False, False, 0)
 
         v_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         v_box.pack_start(resolution_label, False, False, 0)
@@ -299,15 +404,43 @@ class MainWindow(Gtk.Window):
                 self.tracer_model = "path_tracer"
 
     def on_trace_button_clicked(self, menuitem):
-        self.views.trace(
+        started = self.views.trace(
             Tracer(
                 self.parsed_file["lights"],
                 self.parsed_file["cameras"][0],
                 self.parsed_file["objects"],
                 (int(self.width_entry.get_text()), int(self.height_entry.get_text())),
                 model=self.tracer_model,
-            )
+            ),
+            on_progress=self.on_trace_progress,
+            on_finished=self.on_trace_finished,
         )
+        if not started:
+            return
+
+        self.trace_button.set_sensitive(False)
+        self.cancel_button.set_sensitive(True)
+        self.trace_progress.set_fraction(0)
+        self.trace_progress.set_text(None)
+
+    def on_cancel_button_clicked(self, button):
+        self.views.cancel_trace()
+        self.cancel_button.set_sensitive(False)
+
+    def on_trace_progress(self, fraction):
+        self.trace_progress.set_fraction(fraction)
+
+    def on_trace_finished(self, result):
+        self.trace_button.set_sensitive(True)
+        self.cancel_button.set_sensitive(False)
+
+        if result is None:
+            self.trace_progress.set_text("Failed")
+        elif not result.complete:
+            self.trace_progress.set_fraction(result.pixels / result.total_pixels)
+            self.trace_progress.set_text(result.reason.capitalize())
+        else:
+            self.trace_progress.set_text(None)
 
     def on_add_cone_clicked(self, menuitem):
         self.views.full_clear_views()
@@ -369,6 +502,7 @@ class MainWindow(Gtk.Window):
         self.views.draw()
 
     def on_quit_clicked(self, menuitem):
+        self.views.cancel_trace()
         Gtk.main_quit()
 
 
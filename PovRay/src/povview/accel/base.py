@@ -0,0 +1,82 @@
+import numpy as np
+
+from povview.math.kernels import EPSILON
+
+
+class Accelerator:
+    """
+    Common interface of the ray/scene intersection structures.
+
+    Every accelerator answers closest-hit and any-hit queries for scalar
+    ``Ray`` objects and closest-hit queries for batches of rays. Traversal
+    counters are accumulated in ``counters`` so that render workers can send
+    them back to the parent with ``pop_counters``. Those that traverse
+    batches in packets also count their ``steps``: tests of a node against
+    a whole packet at once, the cost that coherent packets bring down.
+    """
+
+    name = None
+    visit_unit = "visits"
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.stats = {"build_time": 0.0}
+        self.counters = {"rays": 0, "visits": 0, "steps": 0}
+
+    def __str__(self):
+        return f"{self.__class__.__name__}(objects: {len(self.objects)})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def closest_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        pass
+
+    def any_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        pass
+
+    def intersect_batch(self, origins, directions, t_min=EPSILON, t_max=np.inf):
+        pass
+
+    @staticmethod
+    def slab(box_min, box_max, o, inv, t0, t1):
+        """
+        Whether a scalar ray, with origin ``o`` and inverse direction
+        ``inv`` (None where the direction is 0), crosses the box within
+        (t0, t1).
+        """
+        for axis in range(3):
+            if inv[axis] is None:
+                if o[axis] < box_min[axis] or o[axis] > box_max[axis]:
+                    return False
+                continue
+
+            near = (box_min[axis] - o[axis]) * inv[axis]
+            far = (box_max[axis] - o[axis]) * inv[axis]
+            if near > far:
+                near, far = far, near
+
+            t0 = near if near > t0 else t0
+            t1 = far if far < t1 else t1
+            if t0 > t1:
+                return False
+
+        return True
+
+    def pop_counters(self):
+        counters = self.counters
+        self.counters = {key: 0 for key in counters}
+        return counters
+
+    def report(self, counters=None):
+        counters = counters if counters is not None else self.counters
+        stats = ", ".join(f"{key}: {value:g}" for key, value in self.stats.items())
+        report = f"{self.name} [{stats}]"
+
+        if counters["rays"]:
+            visits_per_ray = counters["visits"] / counters["rays"]
+            report += f" {self.visit_unit} per ray: {visits_per_ray:.2f}"
+        if counters["steps"]:
+            report += f" rays per step: {counters['visits'] / counters['steps']:.2f}"
+
+        return report
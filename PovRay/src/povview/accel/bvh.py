@@ -0,0 +1,369 @@
+import os
+import time
+import numpy as np
+
+from povview.accel.base import Accelerator
+from povview.accel.primitives import PrimitiveTable
+from povview.math.kernels import EPSILON, inverse_directions, ray_aabb
+
+SAH_BINS = 16
+TRAVERSAL_COST = 1.0
+INTERSECTION_COST = 1.0
+MAX_LEAF_SIZE = 4
+PACKET_SIZE = 256
+
+NODE_ARRAYS = (
+    "node_min",
+    "node_max",
+    "node_child",
+    "node_first",
+    "node_count",
+    "node_axis",
+    "prim_order",
+)
+
+
+def surface_area(box_min, box_max):
+    extent = np.maximum(box_max - box_min, 0)
+    return 2 * (
+        extent[..., 0] * extent[..., 1]
+        + extent[..., 1] * extent[..., 2]
+        + extent[..., 2] * extent[..., 0]
+    )
+
+
+class BVH(Accelerator):
+    """
+    Bounding volume hierarchy over every primitive of the scene, built with
+    the binned surface area heuristic.
+
+    Nodes are stored as flat arrays: ``node_min``/``node_max`` hold the
+    bounds, ``node_count`` is the number of primitives of a leaf (0 for
+    interior nodes), ``node_first`` the first entry of a leaf in
+    ``prim_order`` and ``node_child`` the index of the left child of an
+    interior node, whose right child is ``node_child + 1``. ``node_axis`` is
+    the split axis, used to visit the nearest child first.
+    """
+
+    name = "bvh"
+    visit_unit = "nodes"
+
+    def __init__(self, objects, max_leaf_size=MAX_LEAF_SIZE):
+        super().__init__(objects)
+        self.max_leaf_size = max_leaf_size
+
+        start = time.perf_counter()
+        self.table = PrimitiveTable(objects)
+        self.build()
+        self._nodes = None
+
+        self.stats.update(
+            build_time=time.perf_counter() - start,
+            primitives=len(self.table),
+            nodes=self.node_min.shape[0],
+            leaves=int(np.count_nonzero(self.node_count)),
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_nodes"] = None
+        state.pop("_order", None)
+        return state
+
+    def build(self):
+        table = self.table
+        n = len(table)
+
+        node_min, node_max = [np.zeros(3)], [np.zeros(3)]
+        node_child, node_first, node_count, node_axis = [0], [0], [0], [0]
+        order = []
+
+        stack = [(0, np.arange(n))]
+
+        while stack:
+            node, prims = stack.pop()
+
+            box_min = table.bounds_min[prims].min(axis=0) if n else np.zeros(3)
+            box_max = table.bounds_max[prims].max(axis=0) if n else np.zeros(3)
+            node_min[node], node_max[node] = box_min, box_max
+
+            split = self.find_split(prims, box_min, box_max)
+
+            if split is None:
+                node_first[node], node_count[node] = len(order), prims.size
+                order.extend(prims.tolist())
+                continue
+
+            axis, left, right = split
+            child = len(node_min)
+            node_child[node], node_axis[node] = child, axis
+
+            for _ in range(2):
+                node_min.append(np.zeros(3))
+                node_max.append(np.zeros(3))
+                node_child.append(0)
+                node_first.append(0)
+                node_count.append(0)
+                node_axis.append(0)
+
+            stack.append((child + 1, right))
+            stack.append((child, left))
+
+        self.node_min = np.array(node_min, dtype=np.float64)
+        self.node_max = np.array(node_max, dtype=np.float64)
+        self.node_child = np.array(node_child, dtype=np.int32)
+        self.node_first = np.array(node_first, dtype=np.int32)
+        self.node_count = np.array(node_count, dtype=np.int32)
+        self.node_axis = np.array(node_axis, dtype=np.int8)
+        self.prim_order = np.array(order, dtype=np.int32)
+
+    def find_split(self, prims, box_min, box_max):
+        """
+        Chooses the cheapest binned SAH split of ``prims``.
+
+        Returns:
+            tuple[int, np.ndarray, np.ndarray] | None: split axis and the
+            primitives of each side, or None when a leaf is cheaper.
+        """
+        count = prims.size
+        if count <= 1:
+            return None
+
+        centroids = self.table.centroids[prims]
+        c_min, c_max = centroids.min(axis=0), centroids.max(axis=0)
+        extent = c_max - c_min
+
+        bins = min(SAH_BINS, count)
+        parent_area = surface_area(box_min, box_max)
+        best = (np.inf, None, None)
+
+        for axis in range(3):
+            if extent[axis] <= 0:
+                continue
+
+            ids = ((centroids[:, axis] - c_min[axis]) * (bins / extent[axis])).astype(
+                int
+            )
+            ids = np.minimum(ids, bins - 1)
+
+            bin_count = np.bincount(ids, minlength=bins)
+            bin_min = np.full((bins, 3), np.inf)
+            bin_max = np.full((bins, 3), -np.inf)
+            np.minimum.at(bin_min, ids, self.table.bounds_min[prims])
+            np.maximum.at(bin_max, ids, self.table.bounds_max[prims])
+
+            left_count = np.cumsum(bin_count)[:-1]
+            right_count = np.cumsum(bin_count[::-1])[::-1][1:]
+            left_area = surface_area(
+                np.minimum.accumulate(bin_min)[:-1], np.maximum.accumulate(bin_max)[:-1]
+            )
+            right_area = surface_area(
+                np.minimum.accumulate(bin_min[::-1])[::-1][1:],
+                np.maximum.accumulate(bin_max[::-1])[::-1][1:],
+            )
+
+            cost = TRAVERSAL_COST + INTERSECTION_COST * (
+                left_area * left_count + right_area * right_count
+            ) / max(parent_area, 1e-12)
+            cost[(left_count == 0) | (right_count == 0)] = np.inf
+
+            split = int(np.argmin(cost))
+            if cost[split] < best[0]:
+                best = (cost[split], axis, ids <= split)
+
+        cost, axis, left = best
+
+        if axis is None:
+            if count <= self.max_leaf_size:
+                return None
+            # Coincident centroids: fall back to an even split
+            axis = int(np.argmax(box_max - box_min))
+            left = np.arange(count) < count // 2
+        elif cost >= INTERSECTION_COST * count and count <= self.max_leaf_size:
+            return None
+
+        return axis, prims[left], prims[~left]
+
+    @property
+    def nodes(self):
+        """Node data as tuples of Python scalars, for scalar traversal."""
+        if self._nodes is None:
+            self._nodes = list(
+                zip(
+                    self.node_min.tolist(),
+                    self.node_max.tolist(),
+                    self.node_child.tolist(),
+                    self.node_first.tolist(),
+                    self.node_count.tolist(),
+                    self.node_axis.tolist(),
+                )
+            )
+            self._order = self.prim_order.tolist()
+        return self._nodes
+
+    def traverse(self, ray, t_min, t_max, any_hit):
+        nodes = self.nodes
+        order = self._order
+        table = self.table
+        slab = self.slab
+
+        o = (ray.origin.x, ray.origin.y, ray.origin.z)
+        d = (ray.direction.x, ray.direction.y, ray.direction.z)
+        inv = tuple(1 / c if c else None for c in d)
+
+        best = None
+        visited = 0
+        stack = [0] if len(self.table) else []
+
+        while stack:
+            box_min, box_max, child, first, count, axis = nodes[stack.pop()]
+            visited += 1
+
+            if not slab(box_min, box_max, o, inv, t_min, t_max):
+                continue
+
+            if count:
+                for prim in order[first : first + count]:
+                    if any_hit:
+                        if table.occludes(prim, ray, o, d, t_min, t_max):
+                            best = (prim,)
+                            stack.clear()
+                            break
+                        continue
+
+                    hit = table.intersect(prim, ray, o, d, t_min, t_max)
+                    if hit is None:
+                        continue
+
+                    best, t_max = (prim, *hit), hit[0]
+            elif d[axis] > 0:
+                stack.append(child + 1)
+                stack.append(child)
+            else:
+                stack.append(child)
+                stack.append(child + 1)
+
+        self.counters["rays"] += 1
+        self.counters["visits"] += visited
+
+        return best
+
+    def closest_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        best = self.traverse(ray, t_min, t_max, any_hit=False)
+        if best is None:
+            return None
+
+        prim, t, data = best
+        return self.table.hit(prim, ray, t, data)
+
+    def any_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        return self.traverse(ray, t_min, t_max, any_hit=True) is not None
+
+    def intersect_batch(
+        self,
+        origins,
+        directions,
+        t_min=EPSILON,
+        t_max=np.inf,
+        packet_size=PACKET_SIZE,
+    ):
+        """
+        Closest hit of a batch of rays, traversed in packets of
+        ``packet_size`` consecutive rays: every node is tested against all
+        the rays of a packet that are still active in one vectorized step.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: nearest distance
+            (``np.inf`` on miss), index of the object hit (-1 on miss) and
+            the hit normals.
+        """
+        n = origins.shape[0]
+        inv = inverse_directions(directions)
+
+        nearest = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,)).copy()
+        index = np.full(n, -1, dtype=np.int32)
+        normals = np.zeros_like(origins)
+
+        visited, steps = 0, 0
+        for start in range(0, n if len(self.table) else 0, packet_size or max(n, 1)):
+            stack = [(0, np.arange(start, min(start + (packet_size or n), n)))]
+
+            while stack:
+                node, rays = stack.pop()
+                visited += rays.size
+                steps += 1
+
+                hit, _ = ray_aabb(
+                    origins[rays],
+                    inv[rays],
+                    self.node_min[node],
+                    self.node_max[node],
+                    t_min,
+                    nearest[rays],
+                )
+                rays = rays[hit]
+                if not rays.size:
+                    continue
+
+                count = self.node_count[node]
+                if count:
+                    first = self.node_first[node]
+                    self.table.intersect_batch(
+                        self.prim_order[first : first + count],
+                        origins,
+                        directions,
+                        rays,
+                        t_min,
+                        nearest,
+                        index,
+                        normals,
+                    )
+                    continue
+
+                child = self.node_child[node]
+                if directions[rays, self.node_axis[node]].sum() > 0:
+                    stack.append((child + 1, rays))
+                    stack.append((child, rays))
+                else:
+                    stack.append((child, rays))
+                    stack.append((child + 1, rays))
+
+        self.counters["rays"] += n
+        self.counters["visits"] += visited
+        self.counters["steps"] += steps
+
+        nearest[index < 0] = np.inf
+
+        return nearest, index, normals
+
+    def save(self, directory):
+        """Writes the node arrays as ``.npy`` files into ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        for name in NODE_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, objects, mmap_mode="r"):
+        """
+        Restores a hierarchy written by ``save`` for the same ``objects``,
+        memory-mapping the node arrays instead of rebuilding them.
+        """
+        bvh = cls.__new__(cls)
+        Accelerator.__init__(bvh, objects)
+
+        start = time.perf_counter()
+        bvh.max_leaf_size = MAX_LEAF_SIZE
+        bvh.table = PrimitiveTable(objects)
+        for name in NODE_ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            setattr(bvh, name, np.load(path, mmap_mode=mmap_mode))
+        bvh._nodes = None
+
+        bvh.stats.update(
+            build_time=time.perf_counter() - start,
+            primitives=len(bvh.table),
+            nodes=bvh.node_min.shape[0],
+            leaves=int(np.count_nonzero(bvh.node_count)),
+        )
+
+        return bvh
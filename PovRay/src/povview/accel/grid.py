@@ -0,0 +1,301 @@
+import time
+import numpy as np
+
+from povview.accel.base import Accelerator
+from povview.accel.primitives import PrimitiveTable
+from povview.math.kernels import EPSILON, inverse_directions, ray_aabb
+
+# Cells per primitive used to pick the resolution (lambda in Cleary and
+# Wyvill's rule, 3 to 5 works well)
+GRID_DENSITY = 4.0
+MAX_RESOLUTION = 128
+
+
+class UniformGrid(Accelerator):
+    """
+    Uniform grid over the scene bounds, traversed with 3D-DDA.
+
+    Cells store primitive indices in CSR form: the primitives of cell ``c``
+    are ``cell_prims[cell_start[c]:cell_start[c + 1]]``, with cells
+    numbered ``(z * ny + y) * nx + x``. Building is linear in the number of
+    primitive/cell references, so ``rebuild`` is cheap after objects move.
+    """
+
+    name = "grid"
+    visit_unit = "cells"
+
+    def __init__(self, objects, resolution=None):
+        super().__init__(objects)
+        self.fixed_resolution = resolution
+        self.rebuild()
+
+    def rebuild(self):
+        start = time.perf_counter()
+
+        self.table = PrimitiveTable(self.objects)
+        self.build(self.fixed_resolution)
+
+        self.stats.update(
+            build_time=time.perf_counter() - start,
+            primitives=len(self.table),
+            cells=int(np.prod(self.resolution)),
+            references=self.cell_prims.size,
+        )
+
+    @staticmethod
+    def choose_resolution(count, extent, density=GRID_DENSITY):
+        """
+        Picks a resolution giving roughly ``density`` cells per primitive,
+        ``extent * cbrt(density * count / volume)`` along each axis, with
+        cells as close to cubes as the scene extent allows.
+        """
+        extent = np.maximum(extent, extent.max() * 1e-3)
+        cells_per_unit = np.cbrt(density * max(count, 1) / np.prod(extent))
+        resolution = np.round(extent * cells_per_unit).astype(np.int64)
+        return np.clip(resolution, 1, MAX_RESOLUTION)
+
+    def build(self, resolution=None):
+        table = self.table
+
+        if len(table):
+            grid_min = table.bounds_min.min(axis=0)
+            grid_max = table.bounds_max.max(axis=0)
+        else:
+            grid_min, grid_max = np.zeros(3), np.zeros(3)
+
+        padding = np.maximum((grid_max - grid_min) * 1e-6, 1e-9)
+        self.grid_min, self.grid_max = grid_min - padding, grid_max + padding
+        extent = self.grid_max - self.grid_min
+
+        if resolution is None:
+            resolution = self.choose_resolution(len(table), extent)
+        self.resolution = np.broadcast_to(np.asarray(resolution, np.int64), (3,))
+        self.cell_size = extent / self.resolution
+
+        lo = self.cell_coords(table.bounds_min)
+        hi = self.cell_coords(table.bounds_max)
+        size = hi - lo + 1
+        counts = np.prod(size, axis=1)
+
+        prims = np.repeat(np.arange(len(table)), counts)
+        k = np.arange(prims.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        sx, sy = size[prims, 0], size[prims, 1]
+        cells = lo[prims] + np.stack((k % sx, (k // sx) % sy, k // (sx * sy)), axis=1)
+
+        nx, ny, nz = self.resolution
+        cell_ids = (cells[:, 2] * ny + cells[:, 1]) * nx + cells[:, 0]
+
+        order = np.argsort(cell_ids, kind="stable")
+        self.cell_prims = prims[order].astype(np.int32)
+        self.cell_start = np.zeros(nx * ny * nz + 1, dtype=np.int32)
+        np.cumsum(
+            np.bincount(cell_ids, minlength=nx * ny * nz), out=self.cell_start[1:]
+        )
+
+        self._lists = None
+
+    def cell_coords(self, points):
+        coords = np.floor((points - self.grid_min) / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.resolution - 1)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lists"] = None
+        return state
+
+    @property
+    def lists(self):
+        if self._lists is None:
+            self._lists = (
+                self.cell_start.tolist(),
+                self.cell_prims.tolist(),
+                self.grid_min.tolist(),
+                self.grid_max.tolist(),
+                self.cell_size.tolist(),
+                self.resolution.tolist(),
+                self.table.bounds_min.tolist(),
+                self.table.bounds_max.tolist(),
+            )
+        return self._lists
+
+    def traverse(self, ray, t_min, t_max, any_hit):
+        cell_start, cell_prims, grid_min, grid_max, cell_size, res, lo, hi = self.lists
+        table = self.table
+        slab = self.slab
+
+        o = (ray.origin.x, ray.origin.y, ray.origin.z)
+        d = (ray.direction.x, ray.direction.y, ray.direction.z)
+        inv = tuple(1 / c if c else None for c in d)
+
+        self.counters["rays"] += 1
+
+        # Clip the ray against the grid bounds
+        t0, t1 = t_min, t_max
+        for axis in range(3):
+            if d[axis] == 0:
+                if not grid_min[axis] <= o[axis] <= grid_max[axis]:
+                    return None
+                continue
+
+            near = (grid_min[axis] - o[axis]) / d[axis]
+            far = (grid_max[axis] - o[axis]) / d[axis]
+            if near > far:
+                near, far = far, near
+            t0, t1 = max(t0, near), min(t1, far)
+
+        if t0 > t1 or not len(table):
+            return None
+
+        cell, step, t_next, t_delta = [0] * 3, [0] * 3, [np.inf] * 3, [np.inf] * 3
+        for axis in range(3):
+            p = o[axis] + d[axis] * t0
+            c = int((p - grid_min[axis]) / cell_size[axis])
+            cell[axis] = min(max(c, 0), res[axis] - 1)
+
+            if d[axis] > 0:
+                step[axis] = 1
+                boundary = grid_min[axis] + (cell[axis] + 1) * cell_size[axis]
+                t_next[axis] = (boundary - o[axis]) / d[axis]
+                t_delta[axis] = cell_size[axis] / d[axis]
+            elif d[axis] < 0:
+                step[axis] = -1
+                boundary = grid_min[axis] + cell[axis] * cell_size[axis]
+                t_next[axis] = (boundary - o[axis]) / d[axis]
+                t_delta[axis] = -cell_size[axis] / d[axis]
+
+        best = None
+        tested = set()
+        visited = 0
+        nx, ny = res[0], res[1]
+
+        while True:
+            visited += 1
+            index = (cell[2] * ny + cell[1]) * nx + cell[0]
+
+            for prim in cell_prims[cell_start[index] : cell_start[index + 1]]:
+                if prim in tested:
+                    continue
+                tested.add(prim)
+
+                # Cells are coarse, most of their primitives are missed
+                if not slab(lo[prim], hi[prim], o, inv, t_min, t_max):
+                    continue
+
+                if any_hit:
+                    if table.occludes(prim, ray, o, d, t_min, t_max):
+                        best = (prim,)
+                        break
+                    continue
+
+                hit = table.intersect(prim, ray, o, d, t_min, t_max)
+                if hit is None:
+                    continue
+
+                best, t_max = (prim, *hit), hit[0]
+
+            if best is not None and (any_hit or t_max <= min(t_next)):
+                break
+
+            axis = t_next.index(min(t_next))
+            if t_next[axis] > t1:
+                break
+
+            cell[axis] += step[axis]
+            if not 0 <= cell[axis] < res[axis]:
+                break
+            t_next[axis] += t_delta[axis]
+
+        self.counters["visits"] += visited
+
+        return best
+
+    def closest_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        best = self.traverse(ray, t_min, t_max, any_hit=False)
+        if best is None:
+            return None
+
+        prim, t, data = best
+        return self.table.hit(prim, ray, t, data)
+
+    def any_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        return self.traverse(ray, t_min, t_max, any_hit=True) is not None
+
+    def intersect_batch(self, origins, directions, t_min=EPSILON, t_max=np.inf):
+        """
+        Closest hit of a batch of rays. All rays step through the grid in
+        lockstep; at every step the rays are grouped by the cell they are in
+        and each occupied cell is tested once against its group.
+        """
+        n = origins.shape[0]
+        inv = inverse_directions(directions)
+
+        nearest = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,)).copy()
+        index = np.full(n, -1, dtype=np.int32)
+        normals = np.zeros_like(origins)
+
+        inside, t0 = ray_aabb(
+            origins, inv, self.grid_min, self.grid_max, t_min, nearest
+        )
+        with np.errstate(invalid="ignore"):
+            t1 = np.nan_to_num(
+                np.maximum(
+                    (self.grid_min - origins) * inv, (self.grid_max - origins) * inv
+                ),
+                nan=np.inf,
+            ).min(axis=1)
+        rays = np.flatnonzero(inside) if len(self.table) else np.zeros(0, np.int64)
+
+        points = origins[rays] + directions[rays] * t0[rays, None]
+        cell = self.cell_coords(points)
+
+        d = directions[rays]
+        step = np.sign(d).astype(np.int64)
+        boundary = self.grid_min + (cell + (step > 0)) * self.cell_size
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_next = np.where(step != 0, (boundary - origins[rays]) / d, np.inf)
+            t_delta = np.where(step != 0, self.cell_size / np.abs(d), np.inf)
+
+        nx, ny, _ = self.resolution
+        visited = 0
+
+        while rays.size:
+            visited += rays.size
+            cell_ids = (cell[:, 2] * ny + cell[:, 1]) * nx + cell[:, 0]
+
+            occupied = self.cell_start[cell_ids + 1] > self.cell_start[cell_ids]
+            groups = cell_ids[occupied]
+            members = rays[occupied]
+            for cell_id in np.unique(groups):
+                prims = self.cell_prims[
+                    self.cell_start[cell_id] : self.cell_start[cell_id + 1]
+                ]
+                self.table.intersect_batch(
+                    prims,
+                    origins,
+                    directions,
+                    members[groups == cell_id],
+                    t_min,
+                    nearest,
+                    index,
+                    normals,
+                )
+
+            exit_t = t_next.min(axis=1)
+            axis = t_next.argmin(axis=1)
+            rows = np.arange(rays.size)
+
+            cell[rows, axis] += step[rows, axis]
+            t_next[rows, axis] += t_delta[rows, axis]
+
+            alive = (nearest[rays] > exit_t) & (exit_t <= t1[rays])
+            alive &= np.all((cell >= 0) & (cell < self.resolution), axis=1)
+
+            rays, cell = rays[alive], cell[alive]
+            step, t_next, t_delta = step[alive], t_next[alive], t_delta[alive]
+
+        self.counters["rays"] += n
+        self.counters["visits"] += visited
+
+        nearest[index < 0] = np.inf
+
+        return nearest, index, normals
@@ -0,0 +1,214 @@
+import numpy as np
+
+from povview.math.tracing import Hit
+from povview.math.kernels import EPSILON, ray_triangles
+from povview.math.utils import sign
+
+#  ____       _           _ _   _             _____     _     _
+# |  _ \ _ __(_)_ __ ___ (_) |_(_)_   _____  |_   _|_ _| |__ | | ___
+# | |_) | '__| | '_ ` _ \| | __| \ \ / / _ \   | |/ _` | '_ \| |/ _ \
+# |  __/| |  | | | | | | | | |_| |\ V /  __/   | | (_| | |_) | |  __/
+# |_|   |_|  |_|_| |_| |_|_|\__|_| \_/ \___|   |_|\__,_|_.__/|_|\___|
+#
+
+
+class PrimitiveTable:
+    """
+    Flat list of the primitives of a scene, as seen by the accelerators.
+
+    Mesh objects contribute one primitive per triangle face, analytic
+    objects (``Object3D.analytic``) contribute a single primitive that is
+    intersected through the object itself. Bounds, centroids and triangle
+    data are stored as (P, 3) arrays; ``prim_object`` and ``prim_face`` map
+    each primitive back to its object and face (-1 for analytic shapes).
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+
+        prim_object, prim_face = [], []
+        bounds_min, bounds_max = [], []
+        v0, edge1, edge2, normal = [], [], [], []
+
+        for index, obj in enumerate(objects):
+            if obj.analytic:
+                box_min, box_max = obj.bounds()
+                prim_object.append([index])
+                prim_face.append([-1])
+                bounds_min.append(np.asarray(box_min, dtype=np.float64)[None])
+                bounds_max.append(np.asarray(box_max, dtype=np.float64)[None])
+                for array in (v0, edge1, edge2, normal):
+                    array.append(np.zeros((1, 3)))
+                continue
+
+            mesh = obj.mesh
+            f = len(mesh)
+            corners = np.stack((mesh.v0, mesh.v0 + mesh.edge1, mesh.v0 + mesh.edge2))
+
+            prim_object.append(np.full(f, index))
+            prim_face.append(np.arange(f))
+            bounds_min.append(corners.min(axis=0))
+            bounds_max.append(corners.max(axis=0))
+            v0.append(mesh.v0)
+            edge1.append(mesh.edge1)
+            edge2.append(mesh.edge2)
+            normal.append(mesh.normal)
+
+        def concat(arrays, dtype, shape):
+            if not arrays:
+                return np.zeros(shape, dtype=dtype)
+            return np.ascontiguousarray(np.concatenate(arrays), dtype=dtype)
+
+        self.prim_object = concat(prim_object, np.int32, (0,))
+        self.prim_face = concat(prim_face, np.int32, (0,))
+        self.bounds_min = concat(bounds_min, np.float64, (0, 3))
+        self.bounds_max = concat(bounds_max, np.float64, (0, 3))
+        self.centroids = (self.bounds_min + self.bounds_max) / 2
+        self.v0 = concat(v0, np.float64, (0, 3))
+        self.edge1 = concat(edge1, np.float64, (0, 3))
+        self.edge2 = concat(edge2, np.float64, (0, 3))
+        self.normal = concat(normal, np.float64, (0, 3))
+
+        self._scalar = None
+
+    def __str__(self):
+        return f"PrimitiveTable(objects: {len(self.objects)}, primitives: {len(self)})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return self.prim_object.shape[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_scalar"] = None
+        return state
+
+    @property
+    def scalar(self):
+        """Per-primitive triangle data as plain Python floats, for scalar rays."""
+        if self._scalar is None:
+            self._scalar = [
+                None if face < 0 else (*a, *b, *c)
+                for face, a, b, c in zip(
+                    self.prim_face.tolist(),
+                    self.v0.tolist(),
+                    self.edge1.tolist(),
+                    self.edge2.tolist(),
+                )
+            ]
+        return self._scalar
+
+    def intersect(self, prim, ray, o, d, t_min=EPSILON, t_max=np.inf):
+        """
+        Intersects one scalar ray with one primitive.
+
+        ``o`` and ``d`` are the ray origin and direction as float tuples.
+
+        Returns:
+            tuple[float, object] | None: the distance of the hit inside
+            (t_min, t_max) and, for analytic primitives, the data their
+            ``normal_at`` needs.
+        """
+        tri = self.scalar[prim]
+
+        if tri is None:
+            return self.objects[self.prim_object[prim]].closest_hit(ray, t_min, t_max)
+
+        ax, ay, az, e1x, e1y, e1z, e2x, e2y, e2z = tri
+        ox, oy, oz = o
+        dx, dy, dz = d
+
+        hx = dy * e2z - dz * e2y
+        hy = dz * e2x - dx * e2z
+        hz = dx * e2y - dy * e2x
+        a = e1x * hx + e1y * hy + e1z * hz
+
+        if -EPSILON < a < EPSILON:
+            return None
+
+        f = 1 / a
+        sx, sy, sz = ox - ax, oy - ay, oz - az
+        u = f * (sx * hx + sy * hy + sz * hz)
+
+        if u < 0.0 or u > 1.0:
+            return None
+
+        qx = sy * e1z - sz * e1y
+        qy = sz * e1x - sx * e1z
+        qz = sx * e1y - sy * e1x
+        v = f * (dx * qx + dy * qy + dz * qz)
+
+        if v < 0.0 or u + v > 1.0:
+            return None
+
+        t = f * (e2x * qx + e2y * qy + e2z * qz)
+        if t_min < t < t_max:
+            return t, None
+        return None
+
+    def occludes(self, prim, ray, o, d, t_min=EPSILON, t_max=np.inf):
+        """Any-hit test of one scalar ray against one primitive."""
+        if self.scalar[prim] is None:
+            obj = self.objects[self.prim_object[prim]]
+            return obj.occludes(ray, t_min, t_max)
+
+        return self.intersect(prim, ray, o, d, t_min, t_max) is not None
+
+    def hit(self, prim, ray, t, data=None):
+        """
+        Builds the ``Hit`` record of a scalar ray on a primitive, computing
+        its normal only now that it is known to be the closest.
+        """
+        obj = self.objects[self.prim_object[prim]]
+
+        if self.prim_face[prim] < 0:
+            return Hit(obj, t, obj.normal_at(ray, data))
+
+        face = obj.mesh.triangles[self.prim_face[prim]]
+        return Hit(obj, t, face.normal * -sign(face.normal.dot(ray.direction)))
+
+    def intersect_batch(
+        self, prims, origins, directions, rays, t_min, nearest, index, normals
+    ):
+        """
+        Intersects the rays ``rays`` (indices into ``origins``) with the
+        primitives ``prims``, updating ``nearest``, ``index`` (object index)
+        and ``normals`` in place wherever a closer hit is found.
+        """
+        faces = self.prim_face[prims]
+        triangles = prims[faces >= 0]
+
+        if triangles.size:
+            t, face = ray_triangles(
+                origins[rays],
+                directions[rays],
+                self.v0[triangles],
+                self.edge1[triangles],
+                self.edge2[triangles],
+                t_min,
+                nearest[rays],
+            )
+            closer = t < nearest[rays]
+            winners = triangles[face[closer]]
+            hit_rays = rays[closer]
+
+            n = self.normal[winners]
+            n *= -np.sign(np.einsum("ij,ij->i", n, directions[hit_rays]))[:, None]
+
+            nearest[hit_rays] = t[closer]
+            index[hit_rays] = self.prim_object[winners]
+            normals[hit_rays] = n
+
+        for prim in prims[faces < 0]:
+            obj = self.prim_object[prim]
+            t, n, mask = self.objects[obj].intersect_batch(
+                origins[rays], directions[rays], t_min, nearest[rays]
+            )
+            closer = mask & (t < nearest[rays])
+            hit_rays = rays[closer]
+
+            nearest[hit_rays] = t[closer]
+            index[hit_rays] = obj
+            normals[hit_rays] = n[closer]
@@ -0,0 +1,74 @@
+import numpy as np
+
+from povview.accel.base import Accelerator
+from povview.math.kernels import EPSILON
+from povview.math.tracing import BoundingBox, Hit
+from povview.math.vector import Vec3
+
+
+class ObjectScan(Accelerator):
+    """
+    Tests every ray against every object of the scene, skipping the objects
+    whose bounding box is entered past the closest hit found so far.
+    """
+
+    name = "scan"
+    visit_unit = "objects"
+
+    def __init__(self, objects):
+        super().__init__(objects)
+        self.boxes = [
+            BoundingBox([Vec3(corner) for corner in obj.bounds()]) for obj in objects
+        ]
+
+    def closest_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        self.counters["rays"] += 1
+
+        nearest = None
+        for obj, box in zip(self.objects, self.boxes):
+            if box.entry(ray, t_min, t_max) is None:
+                continue
+
+            self.counters["visits"] += 1
+            hit = obj.closest_hit(ray, t_min, t_max)
+            if hit is not None:
+                nearest, t_max = (obj, hit), hit[0]
+
+        if nearest is None:
+            return None
+
+        obj, (t, data) = nearest
+        return Hit(obj, t, obj.normal_at(ray, data))
+
+    def any_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        self.counters["rays"] += 1
+
+        for obj, box in zip(self.objects, self.boxes):
+            if box.entry(ray, t_min, t_max) is None:
+                continue
+
+            self.counters["visits"] += 1
+            if obj.occludes(ray, t_min, t_max):
+                return True
+
+        return False
+
+    def intersect_batch(self, origins, directions, t_min=EPSILON, t_max=np.inf):
+        n = origins.shape[0]
+        self.counters["rays"] += n
+        self.counters["visits"] += n * len(self.objects)
+
+        nearest = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,)).copy()
+        index = np.full(n, -1, dtype=np.int32)
+        normals = np.zeros_like(origins)
+
+        for i, obj in enumerate(self.objects):
+            t, n_obj, mask = obj.intersect_batch(origins, directions, t_min, nearest)
+            closer = mask & (t < nearest)
+            nearest[closer] = t[closer]
+            index[closer] = i
+            normals[closer] = n_obj[closer]
+
+        nearest[index < 0] = np.inf
+
+        return nearest, index, normals
@@ -0,0 +1,56 @@
+import numpy as np
+
+# A pixel is refined when a neighbour's color differs by more than this much
+# in any channel, on a 0 to 1 scale...
+COLOR_THRESHOLD = 0.1
+
+# ... or when their depths differ by more than this fraction of the nearest
+DEPTH_THRESHOLD = 0.05
+
+#   ____            _                 _
+#  / ___|___  _ __ | |_ _ __ __ _ ___| |_
+# | |   / _ \| '_ \| __| '__/ _` / __| __|
+# | |__| (_) | | | | |_| | | (_| \__ \ |_
+#  \____\___/|_| |_|\__|_|  \__,_|___/\__|
+#
+
+
+def contrast_mask(
+    colors,
+    depths,
+    ids,
+    color_threshold=COLOR_THRESHOLD,
+    depth_threshold=DEPTH_THRESHOLD,
+):
+    """
+    Finds the pixels that stand out from at least one of their 4 neighbours:
+    by color, by depth or because they see another object.
+
+    Args:
+        colors (np.ndarray): (H, W, 3) RGB8 image.
+        depths (np.ndarray): (H, W) distance to the first hit, inf if none.
+        ids (np.ndarray): (H, W) index of the object hit, -1 if none.
+
+    Returns:
+        np.ndarray: (H, W) boolean mask of the pixels worth supersampling.
+    """
+    colors = colors.astype(np.int16)
+    mask = np.zeros(ids.shape, dtype=bool)
+
+    for first, second in [
+        ((slice(None, -1), slice(None)), (slice(1, None), slice(None))),
+        ((slice(None), slice(None, -1)), (slice(None), slice(1, None))),
+    ]:
+        edge = ids[first] != ids[second]
+        edge |= (
+            np.abs(colors[first] - colors[second]).max(axis=-1) > color_threshold * 255
+        )
+
+        near = np.minimum(depths[first], depths[second])
+        with np.errstate(invalid="ignore"):
+            edge |= np.abs(depths[first] - depths[second]) > depth_threshold * near
+
+        mask[first] |= edge
+        mask[second] |= edge
+
+    return mask
@@ -0,0 +1,174 @@
+import numpy as np
+
+# Number of à-trous iterations, the last one reaching 2^n pixels away
+DENOISE_ITERATIONS = 5
+
+# Neighbours whose luminance differs by this many standard deviations of the
+# pixel's noise get a weight of 1 / e...
+COLOR_SIGMA = 4.0
+
+# ... those whose normal is 30° away get about 1 / 8...
+NORMAL_POWER = 16
+
+# ... as those at a depth differing by this fraction per pixel of distance
+DEPTH_SIGMA = 0.05
+
+# B3 spline taps of the à-trous kernel
+KERNEL = np.array([1 / 16, 1 / 4, 3 / 8, 1 / 4, 1 / 16], dtype=np.float32)
+
+LUMINANCE = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+# Rows filtered at once
+BAND_ROWS = 16
+
+# Albedo under which a pixel is filtered as is rather than demodulated
+MIN_ALBEDO = 1e-3
+
+#  ____                        _
+# |  _ \  ___ _ __   ___  __ _(_)___  ___
+# | | | |/ _ \ '_ \ / _ \/ _` | / __|/ _ \
+# | |_| |  __/ | | | (_) | (_| | \__ \  __/
+# |____/ \___|_| |_|\___/ \__, |_|___/\___|
+#                         |___/
+
+
+def denoise(
+    radiance,
+    variance,
+    depth,
+    normal,
+    albedo,
+    iterations=DENOISE_ITERATIONS,
+    color_sigma=COLOR_SIGMA,
+    normal_power=NORMAL_POWER,
+    depth_sigma=DEPTH_SIGMA,
+):
+    """
+    Edge-avoiding à-trous wavelet filter (Dammertz et al. 2010), with the
+    variance guided color weight of SVGF (Schied et al. 2017).
+
+    The radiance is divided by the albedo so that textures are not blurred,
+    then smoothed by ``iterations`` passes of a 5 x 5 B3 spline kernel whose
+    taps are spread 2^i pixels apart. Every tap is weighted down when its
+    normal, depth or luminance differ from the centre's; the luminance is
+    compared against the noise the pixel is expected to have, which each
+    pass lowers as it averages samples out.
+
+    Args:
+        radiance (np.ndarray): (H, W, 3) noisy mean radiance.
+        variance (np.ndarray): (H, W, 3) variance of that mean.
+        depth (np.ndarray): (H, W) distance to the first hit, inf if none.
+        normal (np.ndarray): (H, W, 3) normal at the first hit, 0 if none.
+        albedo (np.ndarray): (H, W, 3) albedo at the first hit, 0 if none.
+
+    Returns:
+        np.ndarray: (H, W, 3) denoised radiance.
+    """
+    albedo = albedo.astype(np.float32)
+    demodulate = np.where(albedo > MIN_ALBEDO, albedo, 1)
+
+    # Channels first, so that every channel of a tap is a contiguous slice
+    color = np.moveaxis(radiance / demodulate, 2, 0).astype(np.float32)
+    variance = (variance / demodulate**2).astype(np.float32) @ LUMINANCE**2
+
+    # Misses get depth 0 and a fourth normal component, so that they only
+    # match each other
+    missed = ~np.isfinite(depth)
+    depth = np.where(missed, 0, depth).astype(np.float32)
+    length = np.linalg.norm(normal, axis=2, keepdims=True)
+    normal = np.divide(normal, length, out=np.zeros_like(normal), where=length > 0)
+    normal = np.concatenate([np.moveaxis(normal, 2, 0), missed[None]]).astype(
+        np.float32
+    )
+
+    for i in range(iterations):
+        color, variance = atrous_pass(
+            color,
+            variance,
+            depth,
+            normal,
+            1 << i,
+            color_sigma,
+            normal_power,
+            depth_sigma,
+        )
+
+    return np.moveaxis(color, 0, 2) * demodulate
+
+
+def atrous_pass(
+    color, variance, depth, normal, step, color_sigma, normal_power, depth_sigma
+):
+    """
+    One pass of ``denoise`` with taps ``step`` pixels apart, on channels
+    first images. Borders are padded by repeating the edge pixels.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the filtered (3, H, W) color and the
+        (H, W) luminance variance left in it.
+    """
+    h, w = depth.shape
+    pad = 2 * step
+
+    def padded(array):
+        widths = ((0, 0),) * (array.ndim - 2) + ((pad, pad), (pad, pad))
+        return np.pad(array, widths, mode="edge")
+
+    color_p, variance_p = padded(color), padded(variance)
+    depth_p, normal_p = padded(depth), padded(normal)
+    luminance_p = np.tensordot(LUMINANCE, color_p, axes=1)
+    luminance = luminance_p[pad : pad + h, pad : pad + w]
+
+    color_scale = 1 / (color_sigma * np.sqrt(variance) + 1e-6)
+    depth_scale = 1 / (depth_sigma * depth + 1e-6)
+
+    total = np.zeros_like(color)
+    total_variance = np.zeros_like(variance)
+    weights = np.zeros_like(depth)
+
+    # Bands of rows small enough for their temporaries to stay in cache
+    for y0 in range(0, h, BAND_ROWS):
+        y1 = min(y0 + BAND_ROWS, h)
+        band = slice(y0, y1)
+        weight, term = np.empty((2, y1 - y0, w), dtype=np.float32)
+
+        for dy in range(-2, 3):
+            for dx in range(-2, 3):
+                rows = slice(pad + y0 + dy * step, pad + y1 + dy * step)
+                columns = slice(pad + dx * step, pad + dx * step + w)
+                distance = max(step * max(abs(dx), abs(dy)), 1)
+
+                # Luminance
+                np.subtract(luminance_p[rows, columns], luminance[band], out=weight)
+                np.abs(weight, out=weight)
+                weight *= color_scale[band]
+
+                # Depth
+                np.subtract(depth_p[rows, columns], depth[band], out=term)
+                np.abs(term, out=term)
+                term *= depth_scale[band]
+                term *= 1 / distance
+                weight += term
+
+                # Normal, cos^p taken as exp(-p (1 - cos)) to share the exp
+                np.multiply(normal_p[0, rows, columns], normal[0, band], out=term)
+                for k in range(1, 4):
+                    term += normal_p[k, rows, columns] * normal[k, band]
+                weight += normal_power
+                term *= normal_power
+                weight -= term
+
+                np.negative(weight, out=weight)
+                np.exp(weight, out=weight)
+                weight *= KERNEL[dy + 2] * KERNEL[dx + 2]
+
+                for k in range(3):
+                    np.multiply(weight, color_p[k, rows, columns], out=term)
+                    total[k, band] += term
+                np.multiply(weight, weight, out=term)
+                term *= variance_p[rows, columns]
+                total_variance[band] += term
+                weights[band] += weight
+
+    # The centre tap always has a weight of 3/8 * 3/8
+    return total / weights, total_variance / weights**2
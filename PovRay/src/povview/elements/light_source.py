@@ -1,11 +1,24 @@
+import numpy as np
+
 from povview.math.color import RGB
 from povview.math.vector import Vec3
 from povview.math.tracing import BoundingBox
 from povview.math.utils import handle_value
+from povview.math.transform import Transform
 from povview.elements.objects.box import Box
 
 
 class LightSource(Box):
+    """
+    Point light, or rectangular area light when the scene gives it an
+    ``area_light`` block: a rectangle centred on ``location`` with sides
+    ``axis1`` and ``axis2``, sampled on a ``size1`` x ``size2`` grid by the
+    ray tracer.
+
+    As in POV-Ray, light does not fade with distance, and an area light
+    lights a point like the average of point lights spread over it.
+    """
+
     def __init__(self, light_data):
         self._subdiv = None
         self.location = Vec3(handle_value(light_data["location"]))
@@ -13,16 +26,60 @@ class LightSource(Box):
             light_data["color"]["r"], light_data["color"]["g"], light_data["color"]["b"]
         )
 
+        self.axis1 = self.axis2 = None
+        self.grid = (1, 1)
+        if "area_light" in light_data:
+            area_light = light_data["area_light"]
+            self.axis1 = Vec3(handle_value(area_light["axis1"]))
+            self.axis2 = Vec3(handle_value(area_light["axis2"]))
+            self.grid = (area_light["size1"], area_light["size2"])
+
         self.corner1 = self.location
         self.corner2 = self.location
+        self.transform = Transform()
 
         self.create_wireframe()
         self.bounding_box = BoundingBox(self.vertices)
-        
+
         self.faces = self.generate_faces()
+        self._mesh = None
 
     def __str__(self):
+        if self.is_area:
+            return (
+                f"LightSource(position={self.location}, color={self.color}, "
+                f"area={self.axis1} x {self.axis2})"
+            )
         return f"LightSource(position={self.location}, color={self.color})"
 
     def __repr__(self):
         return self.__str__()
+
+    @property
+    def is_area(self):
+        return self.axis1 is not None
+
+    @property
+    def area(self):
+        return self.axis1.cross(self.axis2).mag() if self.is_area else 0.0
+
+    def sample_points(self, u):
+        """
+        Points of the light for (N, 2) ``u`` in [0, 1)^2, all at the
+        location for a point light.
+        """
+        points = np.tile(self.location.__array__, (len(u), 1))
+        if self.is_area:
+            points += (u[:, :1] - 0.5) * self.axis1.__array__
+            points += (u[:, 1:] - 0.5) * self.axis2.__array__
+        return points
+
+    def grid_points(self, jitter=None):
+        """
+        One point of the light in each ``grid`` cell, as Vec3: the centres,
+        or the points at (cells, 2) ``jitter`` in [0, 1)^2 within each cell.
+        """
+        n1, n2 = self.grid
+        cells = np.stack(np.meshgrid(np.arange(n1), np.arange(n2)), axis=-1)
+        u = (cells.reshape(-1, 2) + (0.5 if jitter is None else jitter)) / (n1, n2)
+        return [Vec3(point) for point in self.sample_points(u)]
@@ -1,7 +1,6 @@
 import os
 import pickle
 import numpy as np
-from math import cos, radians, sin
 from collections import defaultdict
 
 from povview.utils.utils import setup_goocanvas, timer
@@ -9,7 +8,9 @@ from povview.utils.utils import setup_goocanvas, timer
 setup_goocanvas()
 from gi.repository import GooCanvas
 
-from povview.math.tracing import BoundingBox, Ray, Hit, HitList, Triangle
+from povview.math.tracing import BoundingBox, Ray, Hit, HitList, TriangleMesh
+from povview.math.kernels import EPSILON, inverse_directions, ray_aabb
+from povview.math.transform import Transform
 from povview.math.vector import Vec3
 from povview.math.color import RGB
 from povview.math.utils import handle_value
@@ -20,6 +21,8 @@ LINE_COLOR = "darkgrey"
 
 
 class Object3D:
+    analytic = False
+
     def __init__(
         self,
         data,
@@ -40,11 +43,35 @@ class Object3D:
         self.center = self.get_center()
 
         self.create_wireframe()
+        self.transform = Transform()
         self.apply_modifiers()
 
         self.bounding_box = BoundingBox(self.vertices)
 
         self.faces = self.generate_faces()
+        self._mesh = None
+
+    def __getstate__(self):
+        """
+        Objects are pickled to ship the scene to the render workers, which
+        only trace them: the wireframe is left behind and mesh objects carry
+        their compiled ``TriangleMesh`` arrays instead.
+        """
+        if not self.analytic:
+            self.mesh
+
+        state = self.__dict__.copy()
+        state.update(vertices=[], edges=[], faces=None)
+        return state
+
+    @property
+    def mesh(self):
+        if self._mesh is None:
+            self._mesh = TriangleMesh(self.vertices, self.faces)
+        return self._mesh
+
+    def bounds(self):
+        return self.bounding_box.min.__array__, self.bounding_box.max.__array__
 
     def set_subdiv(self, subdiv):
         self._subdiv = subdiv
@@ -72,13 +99,7 @@ class Object3D:
         if not self.bounding_box.intersection(ray):
             return hitlist
 
-        for face in self.faces:
-            face = Triangle(
-                self.vertices[face[0]],
-                self.vertices[face[1]],
-                self.vertices[face[2]],
-            )
-
+        for face in self.mesh.triangles:
             t = face.intersection(ray)
             if not t:
                 continue
@@ -88,74 +109,101 @@ class Object3D:
 
         return hitlist
 
-    def apply_rotation(self, angle_vector: tuple[float]):
-        angle_vector = [radians(angle) for angle in angle_vector]
-        x_rotation_matrix = np.array(
-            [
-                [1, 0, 0],
-                [0, cos(angle_vector[0]), -sin(angle_vector[0])],
-                [0, sin(angle_vector[0]), cos(angle_vector[0])],
-            ]
-        )
-        y_rotation_matrix = np.array(
-            [
-                [cos(angle_vector[1]), 0, sin(angle_vector[1])],
-                [0, 1, 0],
-                [-sin(angle_vector[1]), 0, cos(angle_vector[1])],
-            ]
-        )
-        z_rotation_matrix = np.array(
-            [
-                [cos(angle_vector[2]), -sin(angle_vector[2]), 0],
-                [sin(angle_vector[2]), cos(angle_vector[2]), 0],
-                [0, 0, 1],
-            ]
-        )
-        rotation_matrix = np.matmul(
-            np.matmul(x_rotation_matrix, y_rotation_matrix), z_rotation_matrix
-        )
+    def closest_hit(self, ray: Ray, t_min=EPSILON, t_max=np.inf):
+        """
+        Nearest crossing of the ray inside (t_min, t_max). Only hits that
+        improve on ``t_max`` are reported, and the mesh is skipped when its
+        bounding box is entered past it.
+
+        Returns:
+            tuple[float, object] | None: the distance of the hit and the data
+            ``normal_at`` needs to build its normal.
+        """
+        if self.bounding_box.entry(ray, t_min, t_max) is None:
+            return None
+
+        best = None
+        for face in self.mesh.triangles:
+            t = face.intersection(ray)
+            if t and t_min < t < t_max:
+                best, t_max = (t, face), t
 
-        for i, vertex in enumerate(self.vertices):
-            self.vertices[i] = Vec3(np.matmul(rotation_matrix, vertex.__array__))
+        return best
 
-        self.center = Vec3(np.matmul(rotation_matrix, self.center.__array__))
+    def normal_at(self, ray: Ray, data):
+        """Normal of a hit reported by ``closest_hit``, facing the ray."""
+        return data.normal * -sign(data.normal.dot(ray.direction))
 
-    def apply_translation(self, translation_vector: tuple[float]):
-        translation_matrix = np.array(
-            [
-                [1, 0, 0, translation_vector[0]],
-                [0, 1, 0, translation_vector[1]],
-                [0, 0, 1, translation_vector[2]],
-                [0, 0, 0, 1],
-            ]
-        )
+    def occludes(self, ray: Ray, t_min=EPSILON, t_max=np.inf):
+        """
+        Any-hit counterpart of ``closest_hit``: tells whether the ray
+        crosses the object inside (t_min, t_max), stopping at the first face
+        found and without building any ``Hit``.
+        """
+        if self.bounding_box.entry(ray, t_min, t_max) is None:
+            return False
 
-        for i, vertex in enumerate(self.vertices):
-            self.vertices[i] = Vec3(
-                np.delete(
-                    np.matmul(translation_matrix, np.append(vertex.__array__, 1)), -1
-                )
+        for face in self.mesh.triangles:
+            t = face.intersection(ray)
+            if t and t_min < t < t_max:
+                return True
+
+        return False
+
+    def intersect_batch(self, origins, directions, t_min=EPSILON, t_max=np.inf):
+        """
+        Vectorized counterpart of ``intersection`` for a batch of rays.
+
+        Rays that miss the bounding box are culled before the compiled mesh
+        is tested with the Möller–Trumbore kernel.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: nearest distance per
+            ray (``np.inf`` on miss), (N, 3) normals oriented against the
+            ray and the boolean hit mask.
+        """
+        n = origins.shape[0]
+        t = np.full(n, np.inf)
+        normals = np.zeros_like(origins)
+
+        candidates, _ = ray_aabb(
+            origins,
+            inverse_directions(directions),
+            self.bounding_box.min.__array__,
+            self.bounding_box.max.__array__,
+            t_min,
+            t_max,
+        )
+        candidates = np.flatnonzero(candidates)
+
+        if candidates.size:
+            t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,))
+            t[candidates], _, normals[candidates] = self.mesh.intersect(
+                origins[candidates],
+                directions[candidates],
+                t_min,
+                t_max[candidates],
             )
 
-        self.center = Vec3(
-            np.delete(
-                np.matmul(translation_matrix, np.append(self.center.__array__, 1)), -1
-            )
-        )
+        return t, normals, np.isfinite(t)
 
-    def apply_scale(self, scale_vector: tuple[float]):
-        scale_matrix = np.array(
-            [
-                [scale_vector[0], 0, 0],
-                [0, scale_vector[1], 0],
-                [0, 0, scale_vector[2]],
-            ]
-        )
+    def apply_transform(self, transform: Transform):
+        """Moves the wireframe and the center by ``transform`` and composes it."""
+        self.transform = transform @ self.transform
 
         for i, vertex in enumerate(self.vertices):
-            self.vertices[i] = Vec3(np.matmul(scale_matrix, vertex.__array__))
+            self.vertices[i] = transform.point(vertex.__array__)
+
+        self.center = transform.point(self.center.__array__)
+
+    def apply_rotation(self, angle_vector: tuple[float]):
+        self.apply_transform(Transform.rotation(angle_vector))
+
+    def apply_translation(self, translation_vector: tuple[float]):
+        self.apply_transform(Transform.translation(translation_vector))
 
-        self.center = Vec3(np.matmul(scale_matrix, self.center.__array__))
+    def apply_scale(self, scale_vector: tuple[float]):
+        self.apply_transform(Transform.scaling(scale_vector))
 
     def apply_pigment(self, color):
         self.color = RGB(color["r"], color["g"], color["b"])
@@ -264,3 +312,103 @@ class Object3D:
                 stroke_color=LINE_COLOR,
                 fill_color=None,
             )
+
+
+class AnalyticObject3D(Object3D):
+    """
+    Object traced from its parametric definition instead of its mesh.
+
+    Subclasses describe the shape in object space through ``local_bounds``,
+    ``local_hits`` (scalar rays) and ``local_intersect_batch`` (batches of
+    rays). Rays are brought into object space with the accumulated
+    ``transform``, so rotations and non-uniform scales stay exact; the
+    wireframe is only used for drawing.
+    """
+
+    analytic = True
+
+    def bounds(self):
+        return self.transform.box(*self.local_bounds())
+
+    def local_bounds(self):
+        pass
+
+    def local_hits(self, o, d):
+        """
+        Returns:
+            list[tuple[float, tuple[float]]]: distance and object-space
+            normal of every crossing of the ray ``o + t * d`` with the shape.
+        """
+        return []
+
+    def local_intersect_batch(self, origins, directions, t_min, t_max):
+        """
+        Returns:
+            tuple[np.ndarray, np.ndarray]: nearest distance inside
+            (t_min, t_max) per ray (``np.inf`` on miss) and the (N, 3)
+            object-space normals.
+        """
+        pass
+
+    @staticmethod
+    def select_nearest(t, normals, t_min, t_max):
+        """
+        Picks, per ray, the nearest of the (N, K) candidate distances ``t``
+        lying inside (t_min, t_max), along with its (N, K, 3) normal.
+        """
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), t.shape[:1])
+        t = np.where((t > t_min) & (t < t_max[:, None]), t, np.inf)
+
+        best = np.argmin(t, axis=1)
+        rows = np.arange(t.shape[0])
+
+        return t[rows, best], normals[rows, best]
+
+    def intersection(self, ray):
+        hitlist = HitList()
+
+        o, d = self.transform.to_local(
+            (ray.origin.x, ray.origin.y, ray.origin.z),
+            (ray.direction.x, ray.direction.y, ray.direction.z),
+        )
+        for t, normal in self.local_hits(o, d):
+            hitlist.append(Hit(self, t, self.transform.normal_to_world(normal)))
+
+        return hitlist
+
+    def closest_hit(self, ray, t_min=EPSILON, t_max=np.inf):
+        o, d = self.transform.to_local(
+            (ray.origin.x, ray.origin.y, ray.origin.z),
+            (ray.direction.x, ray.direction.y, ray.direction.z),
+        )
+
+        best = None
+        for t, normal in self.local_hits(o, d):
+            if t_min < t < t_max:
+                best, t_max = (t, normal), t
+
+        return best
+
+    def normal_at(self, ray, data):
+        return self.transform.normal_to_world(data)
+
+    def occludes(self, ray, t_min=EPSILON, t_max=np.inf):
+        o, d = self.transform.to_local(
+            (ray.origin.x, ray.origin.y, ray.origin.z),
+            (ray.direction.x, ray.direction.y, ray.direction.z),
+        )
+        return any(t_min < t < t_max for t, _ in self.local_hits(o, d))
+
+    def intersect_batch(self, origins, directions, t_min=EPSILON, t_max=np.inf):
+        local_origins, local_directions = self.transform.to_local_batch(
+            origins, directions
+        )
+        t, local_normals = self.local_intersect_batch(
+            local_origins, local_directions, t_min, t_max
+        )
+        mask = np.isfinite(t)
+
+        normals = np.zeros_like(origins)
+        normals[mask] = self.transform.normals_to_world(local_normals[mask])
+
+        return t, normals, mask
@@ -1,9 +1,11 @@
-from povview.math.utils import handle_value
+import numpy as np
+
+from povview.math.utils import handle_value, sign
 from povview.math.vector import Vec3
-from povview.elements.objects.base import Object3D
+from povview.elements.objects.base import AnalyticObject3D
 
 
-class Box(Object3D):
+class Box(AnalyticObject3D):
     def __init__(self, box_data, **kwargs):
         self.corner1 = Vec3(handle_value(box_data["corner_1"]))
         self.corner2 = Vec3(handle_value(box_data["corner_2"]))
@@ -19,6 +21,71 @@ class Box(Object3D):
     def get_center(self):
         return (self.corner1 + self.corner2) / 2
 
+    def local_bounds(self):
+        return (
+            Vec3.min(self.corner1, self.corner2).__array__,
+            Vec3.max(self.corner1, self.corner2).__array__,
+        )
+
+    def local_hits(self, o, d):
+        lo = Vec3.min(self.corner1, self.corner2)
+        hi = Vec3.max(self.corner1, self.corner2)
+
+        t_enter, t_exit = float("-inf"), float("inf")
+        enter_axis = exit_axis = None
+
+        for axis in range(3):
+            if d[axis] == 0:
+                if o[axis] < lo[axis] or o[axis] > hi[axis]:
+                    return []
+                continue
+
+            near = (lo[axis] - o[axis]) / d[axis]
+            far = (hi[axis] - o[axis]) / d[axis]
+            if near > far:
+                near, far = far, near
+
+            if near > t_enter:
+                t_enter, enter_axis = near, axis
+            if far < t_exit:
+                t_exit, exit_axis = far, axis
+            if t_enter > t_exit:
+                return []
+
+        if enter_axis is None or exit_axis is None:
+            return []
+
+        enter_normal = [0, 0, 0]
+        enter_normal[enter_axis] = -sign(d[enter_axis])
+        exit_normal = [0, 0, 0]
+        exit_normal[exit_axis] = sign(d[exit_axis])
+
+        return [(t_enter, enter_normal), (t_exit, exit_normal)]
+
+    def local_intersect_batch(self, origins, directions, t_min, t_max):
+        lo, hi = self.local_bounds()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv = 1 / directions
+            t0 = (lo - origins) * inv
+            t1 = (hi - origins) * inv
+
+        near = np.nan_to_num(np.minimum(t0, t1), nan=-np.inf)
+        far = np.nan_to_num(np.maximum(t0, t1), nan=np.inf)
+
+        rows = np.arange(origins.shape[0])
+        enter_axis, exit_axis = near.argmax(axis=1), far.argmin(axis=1)
+        t_enter, t_exit = near[rows, enter_axis], far[rows, exit_axis]
+
+        normals = np.zeros((origins.shape[0], 2, 3))
+        normals[rows, 0, enter_axis] = -np.sign(directions[rows, enter_axis])
+        normals[rows, 1, exit_axis] = np.sign(directions[rows, exit_axis])
+
+        t = np.stack((t_enter, t_exit), axis=1)
+        t[t_enter > t_exit] = np.inf
+
+        return self.select_nearest(t, normals, t_min, t_max)
+
     def create_wireframe(self):
         self.vertices = [
             Vec3(self.corner1[0], self.corner1[1], self.corner1[2]),
@@ -1,11 +1,12 @@
-from math import cos, sin, pi
+import numpy as np
+from math import cos, sin, pi, sqrt
 
 from povview.math.utils import handle_value
 from povview.math.vector import Vec3
-from povview.elements.objects.base import Object3D
+from povview.elements.objects.base import AnalyticObject3D
 
 
-class Cone(Object3D):
+class Cone(AnalyticObject3D):
     def __init__(self, cone_data, **kwargs):
         self.top_center = Vec3(handle_value(cone_data["top_center"]))
         self.top_radius = cone_data["top_radius"]
@@ -23,6 +24,126 @@ class Cone(Object3D):
     def get_center(self):
         return (self.top_center + self.bottom_center) / 2
 
+    def frame(self):
+        """Axis unit vector, height and radius slope of the cone."""
+        axis = self.top_center - self.bottom_center
+        height = axis.mag()
+        slope = (self.top_radius - self.bottom_radius) / height if height else 0
+        return axis.normalized(), height, slope
+
+    def local_bounds(self):
+        axis, _, _ = self.frame()
+        spread = np.sqrt(np.maximum(1 - axis.__array__**2, 0))
+
+        ends = [
+            (self.bottom_center.__array__, spread * self.bottom_radius),
+            (self.top_center.__array__, spread * self.top_radius),
+        ]
+        return (
+            np.min([center - extent for center, extent in ends], axis=0),
+            np.max([center + extent for center, extent in ends], axis=0),
+        )
+
+    def local_hits(self, o, d):
+        axis, height, slope = self.frame()
+        if not height:
+            return []
+
+        o = Vec3(o) - self.bottom_center
+        d = Vec3(d)
+
+        # Split the ray into its components along and across the axis
+        h0, hd = o.dot(axis), d.dot(axis)
+        q0, qd = o - axis * h0, d - axis * hd
+        r0, rd = self.bottom_radius + slope * h0, slope * hd
+
+        hits = []
+
+        # Lateral surface: |q(t)|^2 = r(t)^2 with 0 <= h(t) <= height
+        a = qd.dot(qd) - rd * rd
+        b = 2 * (q0.dot(qd) - r0 * rd)
+        c = q0.dot(q0) - r0 * r0
+
+        if abs(a) > 1e-12:
+            discriminant = b * b - 4 * a * c
+            roots = []
+            if discriminant >= 0:
+                roots = [
+                    (-b - sqrt(discriminant)) / (2 * a),
+                    (-b + sqrt(discriminant)) / (2 * a),
+                ]
+        else:
+            roots = [-c / b] if b else []
+
+        for t in roots:
+            h = h0 + hd * t
+            r = r0 + rd * t
+            if 0 <= h <= height and r >= 0:
+                q = q0 + qd * t
+                hits.append((t, (q - axis * (r * slope)).__array__))
+
+        # Caps
+        if hd:
+            for h, radius, normal in (
+                (0, self.bottom_radius, -axis),
+                (height, self.top_radius, axis),
+            ):
+                t = (h - h0) / hd
+                q = q0 + qd * t
+                if q.dot(q) <= radius * radius:
+                    hits.append((t, normal.__array__))
+
+        return sorted(hits, key=lambda hit: hit[0])
+
+    def local_intersect_batch(self, origins, directions, t_min, t_max):
+        axis, height, slope = self.frame()
+        n = origins.shape[0]
+        if not height:
+            return np.full(n, np.inf), np.zeros((n, 3))
+
+        axis = axis.__array__
+        o = origins - self.bottom_center.__array__
+
+        h0, hd = o @ axis, directions @ axis
+        q0 = o - h0[:, None] * axis
+        qd = directions - hd[:, None] * axis
+        r0, rd = self.bottom_radius + slope * h0, slope * hd
+
+        a = np.einsum("ij,ij->i", qd, qd) - rd * rd
+        b = 2 * (np.einsum("ij,ij->i", q0, qd) - r0 * rd)
+        c = np.einsum("ij,ij->i", q0, q0) - r0 * r0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            linear = np.abs(a) <= 1e-12
+            discriminant = b * b - 4 * a * c
+            sqrt_d = np.sqrt(np.where(discriminant >= 0, discriminant, np.nan))
+            side = np.stack(((-b - sqrt_d) / (2 * a), (-b + sqrt_d) / (2 * a)), axis=1)
+            side[linear] = np.stack((-c / b, np.full(n, np.nan)), axis=1)[linear]
+
+            caps = np.stack(((0 - h0) / hd, (height - h0) / hd), axis=1)
+
+        t = np.concatenate((side, caps), axis=1)
+        t = np.where(np.isfinite(t), t, np.inf)
+
+        normals = np.zeros((n, 4, 3))
+        with np.errstate(invalid="ignore"):
+            h = h0[:, None] + hd[:, None] * t[:, :2]
+            r = r0[:, None] + rd[:, None] * t[:, :2]
+            q = (
+                q0[:, None]
+                + qd[:, None] * np.where(np.isfinite(t[:, :2]), t[:, :2], 0)[..., None]
+            )
+            normals[:, :2] = q - (r * slope)[..., None] * axis
+        t[:, :2][(h < 0) | (h > height) | (r < 0)] = np.inf
+
+        normals[:, 2] = -axis
+        normals[:, 3] = axis
+        for k, radius in ((2, self.bottom_radius), (3, self.top_radius)):
+            q = q0 + qd * np.where(np.isfinite(t[:, k]), t[:, k], 0)[:, None]
+            t[np.einsum("ij,ij->i", q, q) > radius * radius, k] = np.inf
+
+        return self.select_nearest(t, normals, t_min, t_max)
+
     def create_wireframe(self):
         # Vertices
         circ_sub = 2 * pi / self._subdiv
@@ -1,12 +1,20 @@
 import numpy as np
-from math import cos, pi, sin, sqrt
+from math import cos, hypot, pi, sin, sqrt
 from sympy import symbols, Eq, solve, re, im, N
 
 from povview.math.vector import Vec3
-from povview.elements.objects.base import Object3D
+from povview.math.polynomial import solve_quartic
+from povview.elements.objects.base import AnalyticObject3D
 
 
-class Ovus(Object3D):
+class Ovus(AnalyticObject3D):
+    """
+    Traced exactly as the union of the bottom spherical cap (below
+    ``bottom_interval``), the top spherical cap (above ``top_interval``) and
+    the spindle torus between them, swept by the join circle centred at
+    ``join_curve_centers[1]`` with radius ``bottom_radius + top_radius``.
+    """
+
     def __init__(self, ovus_data, **kwargs):
         self.base_point = Vec3(0, 0, 0)
         self.bottom_radius = ovus_data["bottom_radius"]
@@ -17,6 +25,8 @@ class Ovus(Object3D):
         if not self.is_sphere:
             self.bottom_interval, self.top_interval = self.get_intervals()
 
+        self.bounding_height, self.bounding_radius = self.get_bounding_sphere()
+
         super().__init__(ovus_data, **kwargs)
 
     def __str__(self):
@@ -78,6 +88,225 @@ class Ovus(Object3D):
 
         return A[1], B[1]
 
+    def get_bounding_sphere(self):
+        """Height over the base point and radius of a sphere enclosing the ovus."""
+        if self.is_sphere:
+            return 0, max(self.bottom_radius, self.top_radius)
+
+        height = self.top_radius / 2
+        join_x, join_y = self.join_curve_centers[1]
+        join_radius = self.bottom_radius + self.top_radius - join_x
+        join_height = max(
+            abs(self.bottom_interval - height), abs(self.top_interval - height)
+        )
+
+        return height, max(
+            self.bottom_radius + height,
+            abs(self.bottom_radius - height) + self.top_radius,
+            hypot(join_radius, join_height),
+        )
+
+    def local_bounds(self):
+        base = self.base_point.__array__
+        if self.is_sphere:
+            radius = max(self.bottom_radius, self.top_radius)
+            return base - radius, base + radius
+
+        radius = max(
+            self.bottom_radius,
+            self.top_radius,
+            self.bottom_radius + self.top_radius - self.join_curve_centers[1][0],
+        )
+        return (
+            base + (-radius, -self.bottom_radius, -radius),
+            base + (radius, self.bottom_radius + self.top_radius, radius),
+        )
+
+    @staticmethod
+    def sphere_hits(o, d, center, radius):
+        ox, oy, oz = o[0] - center[0], o[1] - center[1], o[2] - center[2]
+
+        a = d[0] * d[0] + d[1] * d[1] + d[2] * d[2]
+        half_b = d[0] * ox + d[1] * oy + d[2] * oz
+        c = ox * ox + oy * oy + oz * oz - radius**2
+
+        discriminant = half_b**2 - a * c
+        if discriminant < 0:
+            return []
+
+        roots = {(-half_b - sqrt(discriminant)) / a, (-half_b + sqrt(discriminant)) / a}
+
+        return [(t, (ox + d[0] * t, oy + d[1] * t, oz + d[2] * t)) for t in roots]
+
+    def torus_coefficients(self, o, d):
+        """
+        Coefficients of the quartic in ``t`` whose roots are the crossings of
+        the rays with the torus, for origins relative to the base point.
+        Works on float tuples as well as on (N, 3) arrays.
+        """
+        join_x, join_y = self.join_curve_centers[1]
+        radius = self.bottom_radius + self.top_radius
+
+        ox, oy, oz = o[0], o[1] - join_y, o[2]
+        dx, dy, dz = d[0], d[1], d[2]
+
+        dd = dx * dx + dy * dy + dz * dz
+        od = ox * dx + oy * dy + oz * dz
+        f = ox * ox + oy * oy + oz * oz + join_x**2 - radius**2
+        k = 4 * join_x**2
+
+        return (
+            dd * dd,
+            4 * dd * od,
+            2 * dd * f + 4 * od * od - k * (dx * dx + dz * dz),
+            4 * od * f - 2 * k * (ox * dx + oz * dz),
+            f * f - k * (ox * ox + oz * oz),
+        )
+
+    def on_join_surface(self, rho, y):
+        """
+        Tells, for points at distance ``rho`` from the axis and height ``y``,
+        whether they belong to the outer half of the torus (the one drawn by
+        the join curve) and to the band between the two caps.
+        """
+        join_x, join_y = self.join_curve_centers[1]
+        c = join_x**2 + (y - join_y) ** 2 - (self.bottom_radius + self.top_radius) ** 2
+
+        outer = abs(rho * rho + 2 * join_x * rho + c) <= abs(
+            rho * rho - 2 * join_x * rho + c
+        )
+        return outer & (self.bottom_interval <= y) & (y < self.top_interval)
+
+    def local_hits(self, o, d):
+        bx, by, bz = self.base_point.x, self.base_point.y, self.base_point.z
+        o = (o[0] - bx, o[1] - by, o[2] - bz)
+
+        # Bounding sphere early-out, its entry is also where the quartic is
+        # solved from to keep the coefficients well conditioned
+        entry = self.sphere_hits(
+            o, d, (0, self.bounding_height, 0), self.bounding_radius
+        )
+        if not entry:
+            return []
+
+        if self.is_sphere:
+            return sorted(entry, key=lambda hit: hit[0])
+
+        hits = [
+            hit
+            for hit in self.sphere_hits(o, d, (0, 0, 0), self.bottom_radius)
+            if hit[1][1] < self.bottom_interval
+        ]
+        hits += [
+            hit
+            for hit in self.sphere_hits(
+                o, d, (0, self.bottom_radius, 0), self.top_radius
+            )
+            if hit[1][1] + self.bottom_radius >= self.top_interval
+        ]
+
+        t0 = min(t for t, _ in entry)
+        shifted = (o[0] + d[0] * t0, o[1] + d[1] * t0, o[2] + d[2] * t0)
+        join_x, join_y = self.join_curve_centers[1]
+
+        for s in solve_quartic(self.torus_coefficients(shifted, d))[0]:
+            if s != s:
+                continue
+
+            x, y, z = (
+                shifted[0] + d[0] * s,
+                shifted[1] + d[1] * s,
+                shifted[2] + d[2] * s,
+            )
+            rho = hypot(x, z)
+            if not self.on_join_surface(rho, y):
+                continue
+
+            spread = (rho + join_x) / rho if rho else 0
+            hits.append((t0 + s, (x * spread, y - join_y, z * spread)))
+
+        return sorted(hits, key=lambda hit: hit[0])
+
+    @staticmethod
+    def sphere_batch(origins, directions, center, radius):
+        """Both crossings of the rays with a sphere, ``np.nan`` on miss."""
+        oc = origins - center
+
+        a = np.einsum("ij,ij->i", directions, directions)
+        half_b = np.einsum("ij,ij->i", directions, oc)
+        c = np.einsum("ij,ij->i", oc, oc) - radius**2
+
+        discriminant = half_b**2 - a * c
+        sqrt_d = np.sqrt(np.where(discriminant >= 0, discriminant, np.nan))
+
+        t = np.stack(((-half_b - sqrt_d) / a, (-half_b + sqrt_d) / a), axis=1)
+        normals = oc[:, None] + directions[:, None] * t[..., None]
+
+        return t, normals
+
+    def local_intersect_batch(self, origins, directions, t_min, t_max):
+        n = origins.shape[0]
+        t = np.full(n, np.inf)
+        normals = np.zeros_like(origins)
+
+        origins = origins - self.base_point.__array__
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,))
+
+        entry, entry_normals = self.sphere_batch(
+            origins, directions, (0, self.bounding_height, 0), self.bounding_radius
+        )
+        candidates = np.flatnonzero((entry[:, 1] > t_min) & (entry[:, 0] < t_max))
+        if not candidates.size:
+            return t, normals
+
+        if self.is_sphere:
+            t[candidates], normals[candidates] = self.select_nearest(
+                entry[candidates], entry_normals[candidates], t_min, t_max[candidates]
+            )
+            return t, normals
+
+        o, d = origins[candidates], directions[candidates]
+
+        bottom_t, bottom_normals = self.sphere_batch(o, d, 0, self.bottom_radius)
+        with np.errstate(invalid="ignore"):
+            bottom_t[bottom_normals[..., 1] >= self.bottom_interval] = np.nan
+
+        top_center = np.array((0, self.bottom_radius, 0))
+        top_t, top_normals = self.sphere_batch(o, d, top_center, self.top_radius)
+        with np.errstate(invalid="ignore"):
+            top_t[top_normals[..., 1] + self.bottom_radius < self.top_interval] = np.nan
+
+        t0 = entry[candidates, :1]
+        shifted = o + d * t0
+        coefficients = np.stack(self.torus_coefficients(shifted.T, d.T), axis=1)
+        s = solve_quartic(coefficients)
+
+        points = shifted[:, None] + d[:, None] * s[..., None]
+        rho = np.hypot(points[..., 0], points[..., 2])
+        with np.errstate(invalid="ignore"):
+            join_t = np.where(self.on_join_surface(rho, points[..., 1]), t0 + s, np.nan)
+
+        join_x, join_y = self.join_curve_centers[1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spread = np.where(rho > 0, (rho + join_x) / rho, 0)
+        join_normals = np.stack(
+            (
+                points[..., 0] * spread,
+                points[..., 1] - join_y,
+                points[..., 2] * spread,
+            ),
+            axis=-1,
+        )
+
+        t[candidates], normals[candidates] = self.select_nearest(
+            np.concatenate((bottom_t, top_t, join_t), axis=1),
+            np.concatenate((bottom_normals, top_normals, join_normals), axis=1),
+            t_min,
+            t_max[candidates],
+        )
+
+        return t, normals
+
     def get_radius(self, initial_radius: float, relative_height: float):
         return sqrt(initial_radius**2 - relative_height**2)
 
@@ -1,15 +1,15 @@
+import numpy as np
 from math import cos, pi, sin, sqrt
-from numbers import Number
 
 from povview.math.utils import handle_value
 from povview.math.vector import Vec3
-from povview.math.tracing import Hit, HitList
-from povview.elements.objects.base import Object3D
+from povview.math.kernels import ray_sphere
+from povview.elements.objects.base import AnalyticObject3D
 
 
-class Sphere(Object3D):
+class Sphere(AnalyticObject3D):
     def __init__(self, sphere_data, **kwargs):
-        self.center = Vec3(handle_value(sphere_data["center"]))
+        self._center = Vec3(handle_value(sphere_data["center"]))
         self.radius = sphere_data["radius"]
 
         super().__init__(sphere_data, **kwargs)
@@ -21,42 +21,60 @@ class Sphere(Object3D):
         return self.__str__()
 
     def get_center(self):
-        return self.center
+        return Vec3(self._center)
 
     def get_radius(self, initial_radius: float, relative_height: float):
         return sqrt(initial_radius**2 - relative_height**2)
 
-    def apply_scale(self, scale_vector):
-        super().apply_scale(scale_vector)
-
-        if isinstance(scale_vector, tuple):
-            self.radius *= scale_vector[0]
-        elif isinstance(scale_vector, Number):
-            self.radius *= scale_vector
-        else:
-            raise TypeError("scale_vector must be Vec3 or Number")
-
-    def intersection(self, ray):
-        hitlist = HitList()
-
-        b = ray.direction.dot(ray.origin - self.center) * 2
-        c = abs(ray.origin - self.center) ** 2 - self.radius**2
-
-        if b**2 < 4 * c:
-            return hitlist
-        elif b**2 == 4 * c:
-            t = -b / 2
-            normal = ((ray.origin + ray.direction * t) - self.center).normalized()
-            hitlist.append(Hit(self, t, normal))
-        else:
-            t = (-b - sqrt(b**2 - 4 * c)) / 2
-            normal = ((ray.origin + ray.direction * t) - self.center).normalized()
-            hitlist.append(Hit(self, t, normal))
-            t = (-b + sqrt(b**2 - 4 * c)) / 2
-            normal = ((ray.origin + ray.direction * t) - self.center).normalized()
-            hitlist.append(Hit(self, t, normal))
-
-        return hitlist
+    def world_sphere(self):
+        """
+        World-space centre and radius, or None when the transform turns the
+        sphere into an ellipsoid.
+        """
+        scale = self.transform.uniform_scale
+        if scale is None:
+            return None
+        return self.center.__array__, self.radius * scale
+
+    def bounds(self):
+        sphere = self.world_sphere()
+        if sphere is None:
+            return super().bounds()
+
+        center, radius = sphere
+        return center - radius, center + radius
+
+    def local_bounds(self):
+        center = self._center.__array__
+        return center - self.radius, center + self.radius
+
+    def local_hits(self, o, d):
+        cx, cy, cz = self._center.x, self._center.y, self._center.z
+        ox, oy, oz = o[0] - cx, o[1] - cy, o[2] - cz
+
+        a = d[0] * d[0] + d[1] * d[1] + d[2] * d[2]
+        half_b = d[0] * ox + d[1] * oy + d[2] * oz
+        c = ox * ox + oy * oy + oz * oz - self.radius**2
+
+        discriminant = half_b**2 - a * c
+        if discriminant < 0:
+            return []
+
+        roots = {(-half_b - sqrt(discriminant)) / a, (-half_b + sqrt(discriminant)) / a}
+
+        return [
+            (t, (ox + d[0] * t, oy + d[1] * t, oz + d[2] * t)) for t in sorted(roots)
+        ]
+
+    def local_intersect_batch(self, origins, directions, t_min, t_max):
+        center = self._center.__array__
+        t = ray_sphere(origins, directions, center, self.radius, t_min, t_max)
+
+        mask = np.isfinite(t)
+        normals = np.zeros_like(origins)
+        normals[mask] = origins[mask] + directions[mask] * t[mask, None] - center
+
+        return t, normals
 
     def create_wireframe(self):
         # Vertices
@@ -0,0 +1,267 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Extra per-pixel planes a frame buffer can hold: (dtype, channels)
+PLANES = {
+    # Anti-aliasing guides, see ``povview.antialias``
+    "depth": (np.float32, 1),
+    "ids": (np.int32, 1),
+    "edges": (np.bool_, 1),
+    # Color of the first sample of the pixel, before rounding to RGB8
+    "color": (np.float32, 3),
+    # Running statistics of the path traced samples, see ``accumulate``
+    "count": (np.int32, 1),
+    "mean": (np.float32, 3),
+    "m2": (np.float32, 3),
+    # Denoiser guides, with ``depth``, see ``povview.denoise``
+    "normal": (np.float32, 3),
+    "albedo": (np.float32, 3),
+    # Number of samples of the pixel that hit an object
+    "hits": (np.int32, 1),
+    # Pixels the next adaptive pass of the path tracer adds samples to
+    "noisy": (np.bool_, 1),
+}
+
+GUIDE_PLANES = ("depth", "ids", "edges", "color")
+ACCUMULATION_PLANES = ("count", "mean", "m2")
+DENOISE_PLANES = ("depth", "normal", "albedo")
+
+# Arbitrary output variables: what the first hit of the pixels saw, filled by
+# the tracers along with the image when the frame buffer holds them
+AOV_PLANES = ("depth", "normal", "albedo", "ids", "hits")
+
+# Value of the planes for pixels that hit nothing, 0 if not listed
+MISS_VALUES = {"depth": np.inf, "ids": -1}
+
+
+def miss_planes(names, count):
+    """{name: values} of the planes ``names`` for ``count`` pixels that missed."""
+    planes = {}
+    for name in names:
+        dtype, channels = PLANES[name]
+        shape = (count,) if channels == 1 else (count, channels)
+        planes[name] = np.full(shape, MISS_VALUES.get(name, 0), dtype=dtype)
+    return planes
+
+
+#  _____                         ____         __  __
+# |  ___| __ __ _ _ __ ___   ___| __ ) _   _ / _|/ _| ___ _ __
+# | |_ | '__/ _` | '_ ` _ \ / _ \  _ \| | | | |_| |_ / _ \ '__|
+# |  _|| | | (_| | | | | | |  __/ |_) | |_| |  _|  _|  __/ |
+# |_|  |_|  \__,_|_| |_| |_|\___|____/ \__,_|_| |_|  \___|_|
+#
+
+
+class FrameBuffer:
+    """
+    RGB8 image in shared memory, written in place by the render workers.
+
+    Pickling a frame buffer only sends the name of its shared memory block,
+    which the worker attaches to; tiles are then written with ``write`` and
+    the parent just needs to know which tile is done.
+
+    The pixels can live in a caller's ``SharedMemory`` block, which is then
+    written directly, or in any other writable buffer of ``height * width *
+    3`` bytes (a NumPy array, a ``memoryview``, a ``mmap``...). Workers
+    cannot reach such a buffer, so they render into an internal block and
+    ``commit`` copies each finished tile into it; workers are handed a
+    ``shared_view`` that does not know about it.
+
+    The frame buffer can also hold some of the ``PLANES``, in a block of its
+    own, as (height, width[, channels]) attributes of the same name; planes
+    not asked for are None.
+    """
+
+    def __init__(self, size, buffer=None, planes=()):
+        w, h = size
+        self.size = size
+        self.shape = (h, w, 3)
+        self.target = None
+
+        nbytes = int(np.prod(self.shape))
+
+        if isinstance(buffer, shared_memory.SharedMemory):
+            self.shm, self._owner = buffer, False
+        else:
+            if buffer is not None:
+                target = np.frombuffer(buffer, dtype=np.uint8, count=nbytes)
+                if not target.flags.writeable:
+                    raise ValueError("The frame buffer must be writable")
+                self.target = target.reshape(self.shape)
+
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._owner = True
+
+        self.array = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+        self.planes = tuple(dict.fromkeys(planes))
+        self.plane_shm = None
+        if self.planes:
+            self.plane_shm = shared_memory.SharedMemory(
+                create=True, size=self.planes_nbytes()
+            )
+        self._plane_owner = self.plane_shm is not None
+        self.attach_planes()
+
+    def __str__(self):
+        return (
+            f"FrameBuffer(size: {self.size}, name: {self.shm.name}, "
+            f"planes: {self.planes})"
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __getstate__(self):
+        return {
+            "size": self.size,
+            "name": self.shm.name,
+            "planes": self.planes,
+            "plane_name": self.plane_shm.name if self.plane_shm is not None else None,
+        }
+
+    def __setstate__(self, state):
+        w, h = state["size"]
+        self.size = state["size"]
+        self.shape = (h, w, 3)
+        self.target = None
+
+        self.shm, self._owner = shared_memory.SharedMemory(name=state["name"]), False
+        self.array = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+        self.planes = state["planes"]
+        self.plane_shm, self._plane_owner = None, False
+        if state["plane_name"] is not None:
+            self.plane_shm = shared_memory.SharedMemory(name=state["plane_name"])
+        self.attach_planes()
+
+    def shared_view(self):
+        """
+        The frame buffer as the workers see it: the same shared blocks,
+        without the caller's buffer and without owning the blocks, so that
+        a worker never reads the buffer nor unlinks them. A forked worker
+        inherits its arguments instead of unpickling them.
+        """
+        view = object.__new__(FrameBuffer)
+        view.__dict__.update(self.__dict__)
+        view.target = None
+        view._owner = view._plane_owner = False
+        return view
+
+    def plane_shape(self, name):
+        h, w, _ = self.shape
+        channels = PLANES[name][1]
+        return (h, w) if channels == 1 else (h, w, channels)
+
+    def planes_nbytes(self):
+        return sum(
+            int(np.prod(self.plane_shape(name))) * np.dtype(PLANES[name][0]).itemsize
+            for name in self.planes
+        )
+
+    def attach_planes(self):
+        """Maps the planes one after the other onto the plane block."""
+        for name in PLANES:
+            setattr(self, name, None)
+
+        offset = 0
+        for name in self.planes:
+            plane = np.ndarray(
+                self.plane_shape(name),
+                dtype=PLANES[name][0],
+                buffer=self.plane_shm.buf,
+                offset=offset,
+            )
+            setattr(self, name, plane)
+            offset += plane.nbytes
+
+    @property
+    def image(self):
+        """
+        The rendered pixels, as a (height, width, 3) array: the shared block,
+        or the caller's buffer in the parent, where ``commit`` fills it.
+        """
+        return self.array if self.target is None else self.target
+
+    def write(self, pixels, colors, planes=None):
+        """
+        Stores the colors of the pixels at the (rows, columns) ``pixels``,
+        and their values in the ``planes`` given as a {name: values} dict.
+        """
+        self.array[pixels] = colors
+        self.write_planes(pixels, planes)
+
+    def write_planes(self, pixels, planes=None):
+        for name, values in (planes or {}).items():
+            getattr(self, name)[pixels] = values
+
+    def accumulate(self, pixels, samples, planes=None):
+        """
+        Merges new (N, S, 3) radiance ``samples`` of the pixels at the
+        (rows, columns) ``pixels`` into their running mean and sum of squared
+        deviations (Chan et al.), and updates their colors with the new mean.
+        Values of other ``planes`` are stored as in ``write``, but ``hits``
+        add up.
+        """
+        planes = dict(planes or {})
+        if "hits" in planes:
+            self.hits[pixels] += planes.pop("hits")
+        self.write_planes(pixels, planes)
+
+        count = self.count[pixels][:, None].astype(np.float64)
+        mean = self.mean[pixels].astype(np.float64)
+
+        new_count = samples.shape[1]
+        new_mean = samples.mean(axis=1)
+        new_m2 = ((samples - new_mean[:, None]) ** 2).sum(axis=1)
+
+        total = count + new_count
+        delta = new_mean - mean
+
+        self.mean[pixels] = mean + delta * new_count / total
+        self.m2[pixels] += new_m2 + delta**2 * count * new_count / total
+        self.count[pixels] += new_count
+
+        self.array[pixels] = np.clip(self.mean[pixels], 0, 1) * 255
+
+    def relative_error(self, floor, radius=0):
+        """
+        Standard error of the mean radiance of every pixel, relative to that
+        mean plus ``floor`` so that dark pixels do not ask for endless
+        samples. Pixels with fewer than two samples have an infinite error.
+
+        With a ``radius`` the error of every pixel is averaged over the
+        (2 radius + 1) square around it, clamped to the image, which steadies
+        the estimate of pixels with few samples.
+        """
+        count = self.count.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = self.m2.sum(axis=2) / (count - 1)
+            error = np.sqrt(variance / count) / (self.mean.sum(axis=2) + floor)
+
+        error[count < 2] = np.inf
+        if radius:
+            side = 2 * radius + 1
+            windows = np.lib.stride_tricks.sliding_window_view(
+                np.pad(error, radius, mode="edge"), (side, side)
+            )
+            error = windows.mean(axis=(2, 3))
+        return error
+
+    def commit(self, tile):
+        """Called by the parent once a worker has written ``tile``."""
+        if self.target is not None:
+            self.target[tile.slices] = self.array[tile.slices]
+
+    def close(self):
+        """Releases the shared memory blocks, unless they belong to the caller."""
+        self.array = None
+        for name in PLANES:
+            setattr(self, name, None)
+
+        if self._owner:
+            self.shm.close()
+            self.shm.unlink()
+        if self._plane_owner:
+            self.plane_shm.close()
+            self.plane_shm.unlink()
@@ -0,0 +1,152 @@
+import numpy as np
+
+EPSILON = 1e-5
+
+#  ____        _
+# / ___| _ __ | |__   ___ _ __ ___
+# \___ \| '_ \| '_ \ / _ \ '__/ _ \
+#  ___) | |_) | | | |  __/ | |  __/
+# |____/| .__/|_| |_|\___|_|  \___|
+#       |_|
+
+
+def ray_sphere(origins, directions, center, radius, t_min=EPSILON, t_max=np.inf):
+    """
+    Intersects a batch of rays with one sphere.
+
+    Args:
+        origins (np.ndarray): (N, 3) ray origins.
+        directions (np.ndarray): (N, 3) ray directions, not necessarily unit.
+        center (array-like): Sphere centre.
+        radius (float): Sphere radius.
+        t_min (float): Hits closer than this are ignored.
+        t_max (float | np.ndarray): Hits farther than this are ignored.
+
+    Returns:
+        np.ndarray: (N,) distance of the nearest hit inside (t_min, t_max),
+        ``np.inf`` where the ray misses.
+    """
+    oc = origins - np.asarray(center, dtype=np.float64)
+
+    a = np.einsum("ij,ij->i", directions, directions)
+    half_b = np.einsum("ij,ij->i", directions, oc)
+    c = np.einsum("ij,ij->i", oc, oc) - radius**2
+
+    discriminant = half_b**2 - a * c
+    hit = discriminant >= 0
+    sqrt_d = np.sqrt(np.where(hit, discriminant, 0))
+
+    t_near = (-half_b - sqrt_d) / a
+    t_far = (-half_b + sqrt_d) / a
+
+    t = np.where(t_near > t_min, t_near, t_far)
+    hit &= (t > t_min) & (t < t_max)
+
+    return np.where(hit, t, np.inf)
+
+
+#  _____     _                   _
+# |_   _| __(_) __ _ _ __   __ _| | ___  ___
+#   | || '__| |/ _` | '_ \ / _` | |/ _ \/ __|
+#   | || |  | | (_| | | | | (_| | |  __/\__ \
+#   |_||_|  |_|\__,_|_| |_|\__, |_|\___||___/
+#                          |___/
+
+# Upper bound on the number of ray/face pairs evaluated in one block
+TRIANGLE_BLOCK = 1 << 18
+
+
+def ray_triangles(origins, directions, v0, edge1, edge2, t_min=EPSILON, t_max=np.inf):
+    """
+    Möller–Trumbore intersection of a batch of rays against a set of
+    triangles stored as structure-of-arrays.
+
+    Args:
+        origins (np.ndarray): (N, 3) ray origins.
+        directions (np.ndarray): (N, 3) ray directions.
+        v0 (np.ndarray): (F, 3) first vertex of every face.
+        edge1 (np.ndarray): (F, 3) ``v1 - v0`` of every face.
+        edge2 (np.ndarray): (F, 3) ``v2 - v0`` of every face.
+        t_min (float): Hits closer than this are ignored.
+        t_max (float | np.ndarray): Hits farther than this are ignored.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (N,) nearest distance (``np.inf`` on
+        miss) and (N,) index of the face hit (-1 on miss).
+    """
+    n, f = origins.shape[0], v0.shape[0]
+    t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), (n,))
+
+    nearest = np.full(n, np.inf)
+    face = np.full(n, -1, dtype=np.int32)
+
+    if f == 0:
+        return nearest, face
+
+    step = max(1, TRIANGLE_BLOCK // f)
+
+    for start in range(0, n, step):
+        o = origins[start : start + step, None, :]
+        d = directions[start : start + step, None, :]
+
+        h = np.cross(d, edge2)
+        a = np.einsum("fk,nfk->nf", edge1, h)
+        parallel = np.abs(a) < EPSILON
+        inv_a = 1 / np.where(parallel, 1, a)
+
+        s = o - v0
+        u = inv_a * np.einsum("nfk,nfk->nf", s, h)
+        q = np.cross(s, edge1)
+        v = inv_a * np.einsum("nfk,nfk->nf", d, q)
+        t = inv_a * np.einsum("fk,nfk->nf", edge2, q)
+
+        valid = ~parallel & (u >= 0) & (u <= 1) & (v >= 0) & (u + v <= 1)
+        valid &= (t > t_min) & (t < t_max[start : start + step, None])
+        t = np.where(valid, t, np.inf)
+
+        best = np.argmin(t, axis=1)
+        best_t = t[np.arange(t.shape[0]), best]
+        hit = np.isfinite(best_t)
+
+        nearest[start : start + step] = best_t
+        face[start : start + step] = np.where(hit, best, -1)
+
+    return nearest, face
+
+
+#     _        _    ____  ____
+#    / \      / \  | __ )| __ )
+#   / _ \    / _ \ |  _ \|  _ \
+#  / ___ \  / ___ \| |_) | |_) |
+# /_/   \_\/_/   \_\____/|____/
+#
+
+
+def ray_aabb(origins, inv_directions, box_min, box_max, t_min=0, t_max=np.inf):
+    """
+    Slab test of a batch of rays against one axis-aligned box.
+
+    Args:
+        inv_directions (np.ndarray): (N, 3) reciprocal of the ray
+            directions, with ``np.inf`` for zero components.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (N,) boolean hit mask and the
+        distance at which each ray enters the box.
+    """
+    with np.errstate(invalid="ignore"):
+        t0 = (np.asarray(box_min) - origins) * inv_directions
+        t1 = (np.asarray(box_max) - origins) * inv_directions
+
+    t0 = np.nan_to_num(t0, nan=-np.inf)
+    t1 = np.nan_to_num(t1, nan=np.inf)
+
+    t_enter = np.maximum(np.minimum(t0, t1).max(axis=1), t_min)
+    t_exit = np.minimum(np.maximum(t0, t1).min(axis=1), t_max)
+
+    return t_enter <= t_exit, t_enter
+
+
+def inverse_directions(directions):
+    with np.errstate(divide="ignore"):
+        return 1 / directions
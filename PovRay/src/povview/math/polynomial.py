@@ -0,0 +1,55 @@
+import numpy as np
+
+# Roots whose imaginary part is below this (relative) bound are taken as real
+IMAGINARY_TOLERANCE = 1e-6
+NEWTON_STEPS = 2
+
+
+def polyval(coefficients, x):
+    """Evaluates the (N, K) polynomials at the (N, M) points ``x`` (Horner)."""
+    value = np.zeros_like(x)
+    for k in range(coefficients.shape[1]):
+        value = value * x + coefficients[:, k, None]
+    return value
+
+
+def solve_quartic(coefficients):
+    """
+    Real roots of a batch of quartics ``c4 t^4 + c3 t^3 + c2 t^2 + c1 t + c0``.
+
+    The roots are the eigenvalues of the companion matrices, which stays
+    well behaved for the nearly double roots of grazing rays, refined with a
+    couple of Newton steps on the original polynomial.
+
+    Args:
+        coefficients (np.ndarray): (N, 5) coefficients, highest degree first,
+            with a non-zero leading coefficient.
+
+    Returns:
+        np.ndarray: (N, 4) roots, ``np.nan`` where a root is not real.
+    """
+    coefficients = np.atleast_2d(np.asarray(coefficients, dtype=np.float64))
+    n = coefficients.shape[0]
+
+    monic = coefficients[:, 1:] / coefficients[:, :1]
+
+    companion = np.zeros((n, 4, 4))
+    companion[:, 0, :] = -monic
+    companion[:, 1, 0] = companion[:, 2, 1] = companion[:, 3, 2] = 1
+
+    roots = np.linalg.eigvals(companion)
+    real = np.abs(roots.imag) <= IMAGINARY_TOLERANCE * (1 + np.abs(roots.real))
+    roots = roots.real
+
+    derivative = coefficients[:, :4] * np.array([4, 3, 2, 1])
+    for _ in range(NEWTON_STEPS):
+        value = polyval(coefficients, roots)
+        slope = polyval(derivative, roots)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(slope != 0, value / slope, 0)
+
+        polished = roots - step
+        better = np.abs(polyval(coefficients, polished)) < np.abs(value)
+        roots = np.where(better & np.isfinite(polished), polished, roots)
+
+    return np.where(real, roots, np.nan)
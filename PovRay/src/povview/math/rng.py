@@ -0,0 +1,88 @@
+import numpy as np
+
+# SplitMix64 increment and mixing constants (Steele et al. 2014)
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+
+# 53 random bits make a uniform double in [0, 1)
+FLOAT_SHIFT = np.uint64(11)
+FLOAT_SCALE = 2.0**-53
+
+#  _   _           _
+# | | | | __ _ ___| |__
+# | |_| |/ _` / __| '_ \
+# |  _  | (_| \__ \ | | |
+# |_| |_|\__,_|___/_| |_|
+#
+
+
+def mix64(x):
+    """SplitMix64 finalizer: a bijection of uint64 arrays that scrambles every bit."""
+    x = x ^ (x >> np.uint64(30))
+    x *= MIX_1
+    x ^= x >> np.uint64(27)
+    x *= MIX_2
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def hash_keys(*keys):
+    """
+    Hashes broadcastable integer ``keys`` into uint64, in the order given:
+    each one is mixed into the hash of the previous ones.
+    """
+    h = np.zeros(np.broadcast_shapes(*(np.shape(key) for key in keys)), np.uint64)
+    for key in keys:
+        h = mix64((h ^ np.asarray(key).astype(np.uint64)) + GOLDEN_GAMMA)
+    return h
+
+
+#  ____  _   _  ____
+# |  _ \| \ | |/ ___|
+# | |_) |  \| | |  _
+# |  _ <| |\  | |_| |
+# |_| \_\_| \_|\____|
+#
+
+
+class CounterRNG:
+    """
+    Counter-based random numbers for a batch of paths: the number a path
+    draws at some bounce and dimension is a hash of its (seed, pixel,
+    sample) key, the bounce and the dimension, so it does not depend on
+    which paths are traced together, in which worker or in which order.
+    """
+
+    def __init__(self, seed, pixels, samples):
+        """
+        Args:
+            seed (int): Frame seed.
+            pixels (np.ndarray): (N,) pixel index of every path.
+            samples (np.ndarray): (N,) sample index of every path in its pixel.
+        """
+        self.seed = seed
+        self.keys = hash_keys(seed, pixels, samples)
+
+    def __str__(self):
+        return f"CounterRNG(seed: {self.seed}, paths: {len(self.keys)})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def uniform(self, paths, bounce, dimension, count=1):
+        """
+        Uniform numbers in [0, 1) for the dimensions [dimension, dimension +
+        count) of the ``paths`` (indices, all of them if None) at ``bounce``.
+
+        Returns:
+            np.ndarray: (len(paths), count) uniform numbers.
+        """
+        keys = self.keys if paths is None else self.keys[paths]
+        keys = hash_keys(keys, bounce)
+        dimensions = np.arange(dimension, dimension + count, dtype=np.uint64)
+        bits = hash_keys(keys[:, None], dimensions)
+        return (bits >> FLOAT_SHIFT) * FLOAT_SCALE
@@ -0,0 +1,75 @@
+import numpy as np
+
+#  _   _                _                 _
+# | | | | ___ _ __ ___ (_)___ _ __ | |__   ___ _ __ ___
+# | |_| |/ _ \ '_ ` _ \| / __| '_ \| '_ \ / _ \ '__/ _ \
+# |  _  |  __/ | | | | | \__ \ |_) | | | |  __/ | |  __/
+# |_| |_|\___|_| |_| |_|_|___/ .__/|_| |_|\___|_|  \___|
+#                            |_|
+
+
+def orthonormal_basis(normals):
+    """
+    Two (N, 3) unit tangents that make a right-handed orthonormal basis with
+    each of the (N, 3) unit ``normals`` (Duff et al. 2017).
+    """
+    x, y, z = normals.T
+    sign = np.where(z >= 0, 1.0, -1.0)
+    a = -1 / (sign + z)
+    b = x * y * a
+
+    tangents = np.stack((1 + sign * x * x * a, sign * b, -sign * x), axis=1)
+    bitangents = np.stack((b, sign + y * y * a, -y), axis=1)
+    return tangents, bitangents
+
+
+def to_world(local, normals):
+    """Turns (N, 3) directions around +z into directions around ``normals``."""
+    tangents, bitangents = orthonormal_basis(normals)
+    return local[:, :1] * tangents + local[:, 1:2] * bitangents + local[:, 2:] * normals
+
+
+def cosine_hemisphere(normals, u):
+    """
+    Cosine-weighted unit directions in the hemispheres around the (N, 3)
+    unit ``normals``, from (N, 2) uniform numbers ``u``: points uniform on
+    the unit disk (Shirley-Chiu concentric mapping) lifted onto the
+    hemisphere (Malley's method). Their pdf cancels the cosine of a
+    Lambertian BRDF, so no sample is wasted at grazing angles.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the (N, 3) directions and their
+        (N,) solid angle pdfs.
+    """
+    a, b = 2 * u[:, 0] - 1, 2 * u[:, 1] - 1
+
+    wide = np.abs(a) > np.abs(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(wide, a, b)
+        phi = np.where(wide, np.pi / 4 * (b / a), np.pi / 2 - np.pi / 4 * (a / b))
+    phi = np.nan_to_num(phi)
+
+    x, y = r * np.cos(phi), r * np.sin(phi)
+    z = np.sqrt(np.maximum(0, 1 - x * x - y * y))
+    directions = to_world(np.stack((x, y, z), axis=1), normals)
+
+    return directions, z / np.pi
+
+
+def cosine_hemisphere_pdf(directions, normals):
+    return np.maximum(np.einsum("ij,ij->i", directions, normals), 0) / np.pi
+
+
+#  __  __ ___ ____
+# |  \/  |_ _/ ___|
+# | |\/| || |\___ \
+# | |  | || | ___) |
+# |_|  |_|___|____/
+#
+
+
+def power_heuristic(pdf, other_pdf):
+    """Multiple importance sampling weight of the strategy with ``pdf``."""
+    with np.errstate(invalid="ignore"):
+        weight = pdf**2 / (pdf**2 + other_pdf**2)
+    return np.nan_to_num(weight, nan=0.0)
@@ -0,0 +1,143 @@
+import numpy as np
+
+from povview.math.rng import hash_keys
+
+# 32 bit fixed point to a double in [0, 1)
+FIXED_SCALE = 2.0**-32
+
+#  ____        _           _
+# / ___|  ___ | |__   ___ | |
+# \___ \ / _ \| '_ \ / _ \| |
+#  ___) | (_) | |_) | (_) | |
+# |____/ \___/|_.__/ \___/|_|
+#
+
+
+def reverse_bits(x):
+    """Reverses the bits of uint32 arrays."""
+    x = ((x >> 1) & 0x55555555) | ((x & 0x55555555) << 1)
+    x = ((x >> 2) & 0x33333333) | ((x & 0x33333333) << 2)
+    x = ((x >> 4) & 0x0F0F0F0F) | ((x & 0x0F0F0F0F) << 4)
+    x = ((x >> 8) & 0x00FF00FF) | ((x & 0x00FF00FF) << 8)
+    return ((x >> 16) | (x << 16)).astype(np.uint32)
+
+
+def sobol_tables():
+    """
+    Direction numbers of the second Sobol dimension, pre-XORed for every
+    value of every byte of the index, as a (4, 256) uint32 table.
+    """
+    directions = [1 << 31]
+    for _ in range(31):
+        directions.append(directions[-1] ^ (directions[-1] >> 1))
+
+    tables = np.zeros((4, 256), dtype=np.uint32)
+    for byte in range(4):
+        for value in range(256):
+            for bit in range(8):
+                if value >> bit & 1:
+                    tables[byte, value] ^= directions[8 * byte + bit]
+    return tables
+
+
+SOBOL_TABLES = sobol_tables()
+
+
+def sobol_2d(index):
+    """
+    First two dimensions of the Sobol sequence at the uint32 ``index``, as
+    (N, 2) uint32 fixed point numbers: the van der Corput sequence and its
+    Pascal matrix counterpart. Every power of two long run of them is a
+    (0, 2)-net, with one point in each elementary interval.
+    """
+    second = SOBOL_TABLES[0, index & 0xFF]
+    for byte in range(1, 4):
+        second = second ^ SOBOL_TABLES[byte, (index >> 8 * byte) & 0xFF]
+
+    return np.stack((reverse_bits(index), second), axis=1)
+
+
+def laine_karras_permutation(x, seed):
+    """
+    Hash that only lets the bits of ``x`` change the bits above them, the
+    basis of ``owen_scramble`` (Burley 2020).
+    """
+    x = x ^ (x * np.uint32(0x3D20ADEA))
+    x += seed
+    x *= (seed >> 16) | 1
+    x ^= x * np.uint32(0x05526C56)
+    x ^= x * np.uint32(0x53A22864)
+    return x
+
+
+def owen_scramble(x, seed):
+    """
+    Nested uniform scrambling of uint32 fixed point numbers: every bit is
+    flipped or not depending on the bits above it, which randomises the
+    points while keeping the nets they form.
+    """
+    return reverse_bits(laine_karras_permutation(reverse_bits(x), seed))
+
+
+#  ____                        _
+# / ___|  __ _ _ __ ___  _ __ | | ___ _ __
+# \___ \ / _` | '_ ` _ \| '_ \| |/ _ \ '__|
+#  ___) | (_| | | | | | | |_) | |  __/ |
+# |____/ \__,_|_| |_| |_| .__/|_|\___|_|
+#                       |_|
+
+
+class SobolSampler:
+    """
+    Owen-scrambled Sobol points for a batch of paths, a drop-in for
+    ``CounterRNG`` (Burley 2020, "Practical Hash-based Owen Scrambling").
+
+    The dimensions a path asks for come in pairs, each one taken from its
+    own 2D Sobol sequence, shuffled and scrambled with a hash of the pixel,
+    the bounce and the dimension. The ``samples`` of a pixel are indices
+    into all of them, so its successive samples spread evenly over every
+    pair of dimensions instead of clumping like random ones.
+    """
+
+    def __init__(self, seed, pixels, samples):
+        """
+        Args:
+            seed (int): Frame seed.
+            pixels (np.ndarray): (N,) pixel index of every path.
+            samples (np.ndarray): (N,) sample index of every path in its pixel.
+        """
+        self.seed = seed
+        self.keys = hash_keys(seed, pixels)
+        self.samples = np.asarray(samples).astype(np.uint32)
+
+    def __str__(self):
+        return f"SobolSampler(seed: {self.seed}, paths: {len(self.keys)})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def uniform(self, paths, bounce, dimension, count=1):
+        """
+        Points in [0, 1) for the dimensions [dimension, dimension + count)
+        of the ``paths`` (indices, all of them if None) at ``bounce``, like
+        ``CounterRNG.uniform``.
+
+        Returns:
+            np.ndarray: (len(paths), count) sample coordinates.
+        """
+        keys = self.keys if paths is None else self.keys[paths]
+        samples = self.samples if paths is None else self.samples[paths]
+
+        points = []
+        for pair in range(dimension, dimension + count, 2):
+            seeds = (hash_keys(keys, bounce, pair) >> np.uint64(32)).astype(np.uint32)
+            index = owen_scramble(samples, seeds)
+            values = sobol_2d(index)
+            values[:, 0] = owen_scramble(values[:, 0], seeds ^ np.uint32(0xA511E9B3))
+            values[:, 1] = owen_scramble(values[:, 1], seeds ^ np.uint32(0x63D83595))
+            points.append(values)
+
+        return np.concatenate(points, axis=1)[:, :count] * FIXED_SCALE
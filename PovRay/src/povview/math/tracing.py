@@ -2,6 +2,7 @@ import numpy as np
 
 from povview.math.utils import sign
 from povview.math.vector import Vec3
+from povview.math.kernels import EPSILON, ray_triangles
 
 #  ____
 # |  _ \ __ _ _   _
@@ -29,6 +30,98 @@ class Ray:
         return self.origin + self.direction * t
 
 
+#  ____             ____        _       _
+# |  _ \ __ _ _   _| __ )  __ _| |_ ___| |__
+# | |_) / _` | | | |  _ \ / _` | __/ __| '_ \
+# |  _ < (_| | |_| | |_) | (_| | || (__| | | |
+# |_| \_\__,_|\__, |____/ \__,_|\__\___|_| |_|
+#             |___/
+
+
+class RayBatch:
+    """
+    Structure-of-arrays bundle of rays.
+
+    Origins and directions are contiguous (N, 3) float64 arrays, so batched
+    kernels can consume them directly. ``pixels`` holds the (x, y) image
+    coordinate each ray was generated for, when known. Indexing a batch
+    returns a regular ``Ray`` for the scalar code paths.
+    """
+
+    def __init__(self, origins, directions, pixels=None):
+        self.origins = np.ascontiguousarray(origins, dtype=np.float64)
+        self.directions = np.ascontiguousarray(directions, dtype=np.float64)
+
+        assert self.origins.shape == self.directions.shape
+        assert self.origins.ndim == 2 and self.origins.shape[1] == 3
+
+        self.pixels = pixels
+
+    def __str__(self):
+        return f"RayBatch(size: {len(self)})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return self.origins.shape[0]
+
+    def __getitem__(self, index):
+        return Ray(Vec3(self.origins[index]), Vec3(self.directions[index]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def at(self, t):
+        return self.origins + self.directions * np.asarray(t)[:, None]
+
+
+#  ____             _   _
+# / ___|  ___  _ __| |_(_)_ __   __ _
+# \___ \ / _ \| '__| __| | '_ \ / _` |
+#  ___) | (_) | |  | |_| | | | | (_| |
+# |____/ \___/|_|   \__|_|_| |_|\__, |
+#                                |___/
+
+# Bits per axis of the grid that bins ray origins in ``coherent_order``
+ORIGIN_BITS = 10
+
+
+def spread_bits(x):
+    """Spreads the 21 low bits of uint64 ``x`` two zeros apart, for Morton codes."""
+    x = x & 0x1FFFFF
+    x = (x | (x << 32)) & 0x1F00000000FFFF
+    x = (x | (x << 16)) & 0x1F0000FF0000FF
+    x = (x | (x << 8)) & 0x100F00F00F00F00F
+    x = (x | (x << 4)) & 0x10C30C30C30C30C3
+    x = (x | (x << 2)) & 0x1249249249249249
+    return x
+
+
+def coherent_order(origins, directions, bits=ORIGIN_BITS):
+    """
+    Order that groups rays going the same way from the same place: by the
+    octant of their direction, then along a Morton curve through a grid of
+    2^bits cells per axis over the bounds of their origins. Consecutive rays
+    of the order then tend to visit the same nodes of an accelerator.
+
+    Returns:
+        np.ndarray: (N,) indices of the rays, sorted.
+    """
+    octants = (directions > 0) @ np.array([1, 2, 4], dtype=np.uint64)
+
+    low, high = origins.min(axis=0), origins.max(axis=0)
+    scale = (1 << bits) / np.maximum(high - low, 1e-12)
+    cells = np.minimum((origins - low) * scale, (1 << bits) - 1).astype(np.uint64)
+
+    keys = octants << np.uint64(3 * bits)
+    for axis in range(3):
+        keys |= spread_bits(cells[:, axis]) << np.uint64(axis)
+
+    return np.argsort(keys, kind="stable")
+
+
 #   _    _ _ _
 #  | |  | (_) |
 #  | |__| |_| |_
@@ -113,7 +206,9 @@ class Triangle:
 
             self._a, self._b, self._c = new_a, new_b, new_c
 
-        self._normal = (self._b - self._a).cross(self._c - self._a).normalized()
+        self._edge1 = self._b - self._a
+        self._edge2 = self._c - self._a
+        self._normal = self._edge1.cross(self._edge2).normalized()
 
     @property
     def a(self):
@@ -142,8 +237,8 @@ class Triangle:
         return self.__str__()
 
     def intersection(self, ray: Ray):
-        edge1 = self._b - self._a
-        edge2 = self._c - self._a
+        edge1 = self._edge1
+        edge2 = self._edge2
         h = ray.direction.cross(edge2)
         a = edge1.dot(h)
 
@@ -169,6 +264,84 @@ class Triangle:
         return None
 
 
+#  _____     _                   _      __  __           _
+# |_   _| __(_) __ _ _ __   __ _| | ___|  \/  | ___  ___| |__
+#   | || '__| |/ _` | '_ \ / _` | |/ _ \ |\/| |/ _ \/ __| '_ \
+#   | || |  | | (_| | | | | (_| | |  __/ |  | |  __/\__ \ | | |
+#   |_||_|  |_|\__,_|_| |_|\__, |_|\___|_|  |_|\___||___/_| |_|
+#                          |___/
+
+
+class TriangleMesh:
+    """
+    Triangle faces of a mesh compiled into structure-of-arrays form.
+
+    ``v0``, ``edge1``, ``edge2`` and ``normal`` are (F, 3) float64 arrays,
+    computed once so that rays can be tested against every face of the mesh
+    with the vectorized Möller–Trumbore kernel. The scalar ``triangles`` are
+    rebuilt on demand from ``points`` and ``faces`` and are not pickled.
+    """
+
+    def __init__(self, vertices, faces):
+        self.points = np.array(
+            [vertex.__array__ for vertex in vertices], dtype=np.float64
+        ).reshape(-1, 3)
+        self.faces = np.array(faces, dtype=np.int32).reshape(-1, 3)
+
+        self.v0 = self.points[self.faces[:, 0]]
+        self.edge1 = self.points[self.faces[:, 1]] - self.v0
+        self.edge2 = self.points[self.faces[:, 2]] - self.v0
+
+        normal = np.cross(self.edge1, self.edge2)
+        norm = np.linalg.norm(normal, axis=1)
+        self.normal = normal / np.where(norm > 0, norm, 1)[:, None]
+
+        self._triangles = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_triangles"] = None
+        return state
+
+    @property
+    def triangles(self):
+        if self._triangles is None:
+            points = [Vec3(point) for point in self.points.tolist()]
+            self._triangles = [
+                Triangle(points[a], points[b], points[c])
+                for a, b, c in self.faces.tolist()
+            ]
+        return self._triangles
+
+    def __str__(self):
+        return f"TriangleMesh(faces: {len(self)})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return self.v0.shape[0]
+
+    def intersect(self, origins, directions, t_min=EPSILON, t_max=np.inf):
+        """
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: nearest distance per
+            ray (``np.inf`` on miss), index of the face hit (-1 on miss) and
+            the face normal oriented against the ray.
+        """
+        t, face = ray_triangles(
+            origins, directions, self.v0, self.edge1, self.edge2, t_min, t_max
+        )
+
+        normals = np.zeros_like(origins)
+        mask = face >= 0
+        normals[mask] = self.normal[face[mask]]
+        facing = np.einsum("ij,ij->i", normals, directions)
+        normals *= -np.sign(facing)[:, None]
+
+        return t, face, normals
+
+
 #  ____                        _ _             ____
 # | __ )  ___  _   _ _ __   __| (_)_ __   __ _| __ )  _____  __
 # |  _ \ / _ \| | | | '_ \ / _` | | '_ \ / _` |  _ \ / _ \ \/ /
@@ -247,3 +420,27 @@ class BoundingBox:
             return False
 
         return True
+
+    def entry(self, ray: Ray, t_min=0.0, t_max=float("inf")):
+        """
+        Distance at which the ray enters the box, clipped to [t_min, t_max],
+        or None when the ray misses the box inside that interval.
+        """
+        for axis in range(3):
+            origin, direction = ray.origin[axis], ray.direction[axis]
+
+            if direction == 0:
+                if not self.min[axis] <= origin <= self.max[axis]:
+                    return None
+                continue
+
+            near = (self.min[axis] - origin) / direction
+            far = (self.max[axis] - origin) / direction
+            if near > far:
+                near, far = far, near
+
+            t_min, t_max = max(t_min, near), min(t_max, far)
+            if t_min > t_max:
+                return None
+
+        return t_min
@@ -0,0 +1,143 @@
+import numpy as np
+from math import cos, radians, sin, sqrt
+
+from povview.math.vector import Vec3
+
+#  _____                     __
+# |_   _| __ __ _ _ __  ___ / _| ___  _ __ _ __ ___
+#   | || '__/ _` | '_ \/ __| |_ / _ \| '__| '_ ` _ \
+#   | || | | (_| | | | \__ \  _| (_) | |  | | | | | |
+#   |_||_|  \__,_|_| |_|___/_|  \___/|_|  |_| |_| |_|
+#
+
+
+class Transform:
+    """
+    Affine object-to-world transform stored as a 4x4 matrix together with
+    its inverse.
+
+    Rays are brought into object space with ``to_local`` (their direction is
+    not renormalized, so distances along the ray stay valid in world space)
+    and object-space normals are brought back with ``normal_to_world``.
+    """
+
+    def __init__(self, matrix=None, inverse=None):
+        self.matrix = np.eye(4) if matrix is None else np.asarray(matrix, np.float64)
+        self.inverse = np.linalg.inv(self.matrix) if inverse is None else inverse
+        self._rows = None
+
+    def __str__(self):
+        return f"Transform({self.matrix[:3].tolist()})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __matmul__(self, other):
+        return Transform(self.matrix @ other.matrix, other.inverse @ self.inverse)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_rows"] = None
+        return state
+
+    @classmethod
+    def linear(cls, matrix):
+        affine = np.eye(4)
+        affine[:3, :3] = matrix
+        return cls(affine)
+
+    @classmethod
+    def rotation(cls, angle_vector):
+        ax, ay, az = [radians(angle) for angle in angle_vector]
+        x_rotation_matrix = np.array(
+            [[1, 0, 0], [0, cos(ax), -sin(ax)], [0, sin(ax), cos(ax)]]
+        )
+        y_rotation_matrix = np.array(
+            [[cos(ay), 0, sin(ay)], [0, 1, 0], [-sin(ay), 0, cos(ay)]]
+        )
+        z_rotation_matrix = np.array(
+            [[cos(az), -sin(az), 0], [sin(az), cos(az), 0], [0, 0, 1]]
+        )
+        return cls.linear(x_rotation_matrix @ y_rotation_matrix @ z_rotation_matrix)
+
+    @classmethod
+    def translation(cls, translation_vector):
+        affine = np.eye(4)
+        affine[:3, 3] = translation_vector
+        return cls(affine)
+
+    @classmethod
+    def scaling(cls, scale_vector):
+        return cls.linear(np.diag(scale_vector))
+
+    @property
+    def uniform_scale(self):
+        """The scale factor if the transform preserves shapes, else None."""
+        linear = self.matrix[:3, :3]
+        gram = linear.T @ linear
+        scale = gram[0, 0]
+        if np.allclose(gram, scale * np.eye(3), rtol=1e-9, atol=1e-12):
+            return sqrt(scale)
+        return None
+
+    @property
+    def rows(self):
+        """Inverse and normal matrices as Python floats, for scalar rays."""
+        if self._rows is None:
+            self._rows = (
+                self.inverse[:3].tolist(),
+                self.inverse[:3, :3].T.tolist(),
+            )
+        return self._rows
+
+    def point(self, p):
+        return Vec3(
+            self.matrix[:3, :3] @ np.asarray(p, np.float64) + self.matrix[:3, 3]
+        )
+
+    def box(self, box_min, box_max):
+        """World-space bounds of an object-space axis-aligned box."""
+        corners = np.array(
+            [
+                [x, y, z]
+                for x in (box_min[0], box_max[0])
+                for y in (box_min[1], box_max[1])
+                for z in (box_min[2], box_max[2])
+            ],
+            dtype=np.float64,
+        )
+        corners = corners @ self.matrix[:3, :3].T + self.matrix[:3, 3]
+        return corners.min(axis=0), corners.max(axis=0)
+
+    def to_local(self, o, d):
+        """Brings a scalar ray, given as float tuples, into object space."""
+        (r0, r1, r2), _ = self.rows
+        return (
+            (
+                r0[0] * o[0] + r0[1] * o[1] + r0[2] * o[2] + r0[3],
+                r1[0] * o[0] + r1[1] * o[1] + r1[2] * o[2] + r1[3],
+                r2[0] * o[0] + r2[1] * o[1] + r2[2] * o[2] + r2[3],
+            ),
+            (
+                r0[0] * d[0] + r0[1] * d[1] + r0[2] * d[2],
+                r1[0] * d[0] + r1[1] * d[1] + r1[2] * d[2],
+                r2[0] * d[0] + r2[1] * d[1] + r2[2] * d[2],
+            ),
+        )
+
+    def normal_to_world(self, n):
+        _, (r0, r1, r2) = self.rows
+        return Vec3(
+            r0[0] * n[0] + r0[1] * n[1] + r0[2] * n[2],
+            r1[0] * n[0] + r1[1] * n[1] + r1[2] * n[2],
+            r2[0] * n[0] + r2[1] * n[1] + r2[2] * n[2],
+        ).normalized()
+
+    def to_local_batch(self, origins, directions):
+        linear = self.inverse[:3, :3].T
+        return origins @ linear + self.inverse[:3, 3], directions @ linear
+
+    def normals_to_world(self, normals):
+        normals = normals @ self.inverse[:3, :3]
+        norm = np.linalg.norm(normals, axis=1)
+        return normals / np.where(norm > 0, norm, 1)[:, None]
@@ -1,9 +1,6 @@
 import numpy as np
 from numbers import Number
-from math import cos, log, pi, sqrt
-import random
-
-from povview.math.utils import sign
+from math import sqrt
 
 
 # __     __        ____
@@ -222,24 +219,6 @@ class Vec3:
     def max(v1, v2):
         return Vec3(max(v1.x, v2.x), max(v1.y, v2.y), max(v1.z, v2.z))
 
-    @staticmethod
-    def random_value_normal_distribution():
-        theta = 2 * pi * random.random()
-        rho = sqrt(-2 * log(random.random()))
-        return rho * cos(theta)
-
-    @staticmethod
-    def random_direction():
-        x = Vec3.random_value_normal_distribution()
-        y = Vec3.random_value_normal_distribution()
-        z = Vec3.random_value_normal_distribution()
-        return Vec3(x, y, z).normalized()
-
-    @staticmethod
-    def random_hemisphere_direction(normal):
-        direction = Vec3.random_direction()
-        return direction * sign(direction.dot(normal))
-
 
 # __     __        _  _
 # \ \   / /__  ___| || |
@@ -62,12 +62,27 @@ class Parser:
             + color_vector3
         )
 
+        # "adaptive" and "jitter" are accepted for compatibility and ignored
+        area_light = pp.Group(
+            pp.Suppress(pp.Keyword("area_light"))
+            + vector3("axis1")
+            + comma
+            + vector3("axis2")
+            + comma
+            + uinteger("size1")
+            + comma
+            + uinteger("size2")
+            + pp.Optional(pp.Suppress(pp.Keyword("adaptive") + uinteger))
+            + pp.Optional(pp.Suppress(pp.Keyword("jitter")))
+        )
+
         light = (
             pp.Keyword("light_source")
             + open_brace
             + vector3("location")
             + comma
             + rgb_vector3("color")
+            + pp.Optional(area_light("area_light"))
             + close_brace
         ).setResultsName("lights", listAllMatches=True)
         light.set_parse_action(lambda t: LightSource(t.as_dict()))
@@ -0,0 +1,122 @@
+import time
+import multiprocessing
+
+#   ____                     _ _       _   _
+#  / ___|__ _ _ __   ___ ___| | | __ _| |_(_) ___  _ __
+# | |   / _` | '_ \ / __/ _ \ | |/ _` | __| |/ _ \| '_ \
+# | |__| (_| | | | | (_|  __/ | | (_| | |_| | (_) | | | |
+#  \____\__,_|_| |_|\___\___|_|_|\__,_|\__|_|\___/|_| |_|
+#
+
+
+class CancellationToken:
+    """
+    Cooperative stop signal of a render, with an optional wall-clock
+    deadline.
+
+    The token is shared with the render workers, which poll
+    ``is_cancelled`` while tracing a tile and stop early once it is set.
+    The deadline uses the system-wide monotonic clock, so every process
+    sees it expire at the same moment. The token can only be shared with
+    workers started from the same ``multiprocessing`` ``context``.
+    """
+
+    def __init__(self, timeout=None, context=None):
+        self._event = (context or multiprocessing).Event()
+        self.deadline = None
+        self.reason = None
+
+        if timeout is not None:
+            self.set_timeout(timeout)
+
+    def __str__(self):
+        return f"CancellationToken(deadline: {self.deadline}, reason: {self.reason})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def set_timeout(self, timeout):
+        """Gives the render ``timeout`` seconds from now."""
+        self.deadline = time.monotonic() + timeout
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0)
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self):
+        """Tells whether the render must stop, recording why in ``reason``."""
+        if self.reason is None:
+            if self._event.is_set():
+                self.reason = "cancelled"
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = "deadline"
+
+        return self.reason is not None
+
+
+#  ____                _           ____                 _ _
+# |  _ \ ___ _ __   __| | ___ _ __|  _ \ ___  ___ _   _| | |_
+# | |_) / _ \ '_ \ / _` |/ _ \ '__| |_) / _ \/ __| | | | | __|
+# |  _ <  __/ | | | (_| |  __/ |  |  _ <  __/\__ \ |_| | | |_
+# |_| \_\___|_| |_|\__,_|\___|_|  |_| \_\___||___/\__,_|_|\__|
+#
+
+
+class RenderResult:
+    """
+    Outcome of a render: the best image available when it ended and what
+    was actually done.
+
+    Attributes:
+        image (Image.Image): The final image, or the best approximation of
+            it when the render was stopped.
+        complete (bool): Whether every pass ran to completion.
+        reason (str | None): ``"cancelled"`` or ``"deadline"`` when stopped.
+        passes (int): Passes finished, out of ``total_passes``.
+        tiles (int): Tiles finished over all passes, out of ``total_tiles``.
+        partial_tiles (int): Tiles interrupted while being traced.
+        pixels (int): Pixels traced, out of ``total_pixels``.
+        elapsed (float): Wall-clock duration of the render, in seconds.
+        stats (dict): Transfer and setup figures of the render.
+    """
+
+    def __init__(
+        self,
+        image,
+        reason,
+        passes,
+        total_passes,
+        tiles,
+        partial_tiles,
+        total_tiles,
+        pixels,
+        total_pixels,
+        elapsed,
+        stats,
+    ):
+        self.image = image
+        self.reason = reason
+        self.complete = reason is None
+        self.passes, self.total_passes = passes, total_passes
+        self.tiles, self.partial_tiles = tiles, partial_tiles
+        self.total_tiles = total_tiles
+        self.pixels, self.total_pixels = pixels, total_pixels
+        self.elapsed = elapsed
+        self.stats = stats
+
+    def __str__(self):
+        state = "complete" if self.complete else f"stopped ({self.reason})"
+        return (
+            f"RenderResult({state}, passes: {self.passes}/{self.total_passes}, "
+            f"tiles: {self.tiles}/{self.total_tiles} "
+            f"(+{self.partial_tiles} partial), "
+            f"pixels: {self.pixels}/{self.total_pixels}, "
+            f"elapsed: {self.elapsed:.3f} s)"
+        )
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,211 @@
+import os
+import numpy as np
+from math import atan2
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+
+TILE_SIZE = 32
+
+#  _____ _ _
+# |_   _(_) | ___
+#   | | | | |/ _ \
+#   | | | | |  __/
+#   |_| |_|_|\___|
+#
+
+
+class Tile:
+    """Rectangle [x0, x1) x [y0, y1) of the image, rendered as one task."""
+
+    def __init__(self, index, x0, y0, x1, y1):
+        self.index = index
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+
+    def __str__(self):
+        return f"Tile({self.index}: [{self.x0}, {self.x1}) x [{self.y0}, {self.y1}))"
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def width(self):
+        return self.x1 - self.x0
+
+    @property
+    def height(self):
+        return self.y1 - self.y0
+
+    @property
+    def bounds(self):
+        return self.x0, self.y0, self.x1, self.y1
+
+    @property
+    def slices(self):
+        """Row and column slices of the tile inside a full-size image."""
+        return slice(self.y0, self.y1), slice(self.x0, self.x1)
+
+    def pixels(self, block=1, coarser=None):
+        """
+        Rows and columns, in scanline order, of the pixels of the tile whose
+        coordinates are multiples of ``block``, leaving out those that are
+        also multiples of ``coarser``.
+        """
+        ys, xs = np.mgrid[self.y0 : self.y1, self.x0 : self.x1]
+        keep = (xs % block == 0) & (ys % block == 0)
+        if coarser:
+            keep &= (xs % coarser != 0) | (ys % coarser != 0)
+        return ys[keep], xs[keep]
+
+
+def split_tiles(size, tile_size=TILE_SIZE):
+    """
+    Cuts an image of ``size`` (width, height) into tiles of at most
+    ``tile_size`` pixels per side, listed in scanline order.
+    """
+    w, h = size
+    tw, th = (tile_size, tile_size) if np.isscalar(tile_size) else tile_size
+
+    return [
+        Tile(index, x0, y0, min(x0 + tw, w), min(y0 + th, h))
+        for index, (y0, x0) in enumerate(
+            (y0, x0) for y0 in range(0, h, th) for x0 in range(0, w, tw)
+        )
+    ]
+
+
+#   ___          _
+#  / _ \ _ __ __| | ___ _ __ ___
+# | | | | '__/ _` |/ _ \ '__/ __|
+# | |_| | | | (_| |  __/ |  \__ \
+#  \___/|_|  \__,_|\___|_|  |___/
+#
+
+
+def grid_position(tile, tiles):
+    """Column and row of a tile in the tile grid."""
+    return tile.x0 // tiles[0].width, tile.y0 // tiles[0].height
+
+
+def scanline_order(tiles):
+    return list(tiles)
+
+
+def spiral_order(tiles):
+    """Starts at the centre of the image and winds outwards ring by ring."""
+    columns = max(grid_position(tile, tiles)[0] for tile in tiles) + 1
+    rows = max(grid_position(tile, tiles)[1] for tile in tiles) + 1
+    cx, cy = (columns - 1) / 2, (rows - 1) / 2
+
+    def key(tile):
+        x, y = grid_position(tile, tiles)
+        dx, dy = x - cx, y - cy
+        return max(abs(dx), abs(dy)), atan2(dy, dx)
+
+    return sorted(tiles, key=key)
+
+
+def hilbert_index(x, y, order):
+    """Distance of the cell (x, y) along the Hilbert curve of a 2^order grid."""
+    d = 0
+    s = 1 << (order - 1) if order else 0
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+
+        if ry == 0:
+            if rx == 1:
+                x, y = s - 1 - x, s - 1 - y
+            x, y = y, x
+        s >>= 1
+
+    return d
+
+
+def hilbert_order(tiles):
+    """Follows a Hilbert curve, so consecutive tiles are always neighbours."""
+    positions = [grid_position(tile, tiles) for tile in tiles]
+    extent = max(max(x, y) for x, y in positions) + 1
+    order = max(extent - 1, 0).bit_length()
+
+    return [
+        tile
+        for _, tile in sorted(
+            zip(positions, tiles), key=lambda item: hilbert_index(*item[0], order)
+        )
+    ]
+
+
+TILE_ORDERS = {
+    "scanline": scanline_order,
+    "spiral": spiral_order,
+    "hilbert": hilbert_order,
+}
+
+
+#  ____       _              _       _
+# / ___|  ___| |__   ___  __| |_   _| | ___ _ __
+# \___ \ / __| '_ \ / _ \/ _` | | | | |/ _ \ '__|
+#  ___) | (__| | | |  __/ (_| | |_| | |  __/ |
+# |____/ \___|_| |_|\___|\__,_|\__,_|_|\___|_|
+#
+
+
+class TileScheduler:
+    """
+    Hands the tiles of an image to an executor in a given order, keeping at
+    most ``max_in_flight`` of them submitted at any time so that results can
+    be consumed (and displayed) while the rest of the frame renders.
+    """
+
+    def __init__(self, size, tile_size=TILE_SIZE, order="spiral", max_in_flight=None):
+        if order not in TILE_ORDERS:
+            raise ValueError(f"Unknown tile order: {order}")
+
+        self.size = size
+        self.order = order
+        self.tiles = TILE_ORDERS[order](split_tiles(size, tile_size))
+        self.max_in_flight = max_in_flight or 2 * (os.cpu_count() or 1)
+
+    def __str__(self):
+        return (
+            f"TileScheduler(tiles: {len(self.tiles)}, order: {self.order}, "
+            f"max_in_flight: {self.max_in_flight})"
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def run(self, executor, task, *args, cancelled=None, tiles=None):
+        """
+        Submits ``task(tile, *args)`` for every tile, or only for ``tiles``,
+        and yields the results as they complete.
+
+        ``cancelled`` is polled whenever a tile completes; once it returns
+        True no more tiles are submitted and the queued ones are dropped.
+        The tiles already being traced are still waited for and yielded, the
+        task is expected to notice the cancellation and return early.
+        """
+        pending = set()
+        tiles = iter(tiles if tiles is not None else self.tiles)
+
+        while True:
+            if cancelled is not None and cancelled():
+                running = [future for future in pending if not future.cancel()]
+                for future in as_completed(running):
+                    yield future.result()
+                return
+
+            for tile in tiles:
+                pending.add(executor.submit(task, tile, *args))
+                if len(pending) >= self.max_in_flight:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -1,24 +1,94 @@
+import os
+import time
+import pickle
 import numpy as np
 from PIL import Image
 from io import BytesIO
 from math import tan, radians
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 
-from povview.math.vector import Vec3
-from povview.math.tracing import Ray, HitList
+from povview.math.tracing import Ray, RayBatch, coherent_order
 from povview.math.color import RGB
+from povview.math.utils import sign
+from povview.math.rng import CounterRNG
+from povview.math.sequences import SobolSampler
+from povview.math.sampling import (
+    cosine_hemisphere,
+    cosine_hemisphere_pdf,
+    power_heuristic,
+)
 from povview.elements.objects.base import Object3D
 from povview.elements.light_source import LightSource
 from povview.elements.camera import Camera
-from povview.utils.utils import setup_goocanvas, timer
+from povview.accel.bvh import BVH
+from povview.accel.grid import UniformGrid
+from povview.accel.scan import ObjectScan
+from povview.math.kernels import EPSILON
+from povview.tiles import TILE_SIZE, TileScheduler
+from povview.framebuffer import (
+    FrameBuffer,
+    GUIDE_PLANES,
+    ACCUMULATION_PLANES,
+    DENOISE_PLANES,
+    AOV_PLANES,
+    miss_planes,
+)
+from povview.antialias import contrast_mask
+from povview.denoise import denoise
+from povview.render import CancellationToken, RenderResult
+from povview.utils.utils import setup_goocanvas, timer, logger
 
 setup_goocanvas()
 from gi.repository import GooCanvas, GdkPixbuf
 
-MAX_BOUNCES = 1
-LIGHT_SOURCE_SIZE = 100000
+MAX_BOUNCES = 8
+
+# Bounces every path takes before Russian roulette may terminate it
+RUSSIAN_ROULETTE_DEPTH = 2
+
+# The path tracer adds samples to a pixel until the standard error of the
+# pixels within ERROR_RADIUS of it is below TARGET_ERROR times their radiance
+# (plus ERROR_FLOOR), or it has MAX_PIXEL_SAMPLES samples
+TARGET_ERROR = 0.05
+ERROR_FLOOR = 0.1
+ERROR_RADIUS = 1
+MAX_PIXEL_SAMPLES = 256
+
+# Samples of a ray traced pixel on an edge, others get just one: 1 turns the
+# anti-aliasing off
 RAYS_CASTS_PER_PIXEL = 1
 
+# Samples per pixel of every pass of the path tracer
+PASS_SAMPLES = 8
+
+# What a render leaves on the tracer, not sent to the workers along with it
+RENDER_OUTPUTS = (
+    "render_stats",
+    "render_result",
+    "radiance",
+    "sample_counts",
+    "variance",
+    "aovs",
+    "denoise_guides",
+    "denoised",
+    "_img",
+)
+
+# Block side of the first pass of a progressive render
+PROGRESSIVE_BLOCK = 16
+
+# Number of rays traced between two checks of the cancellation token
+CANCEL_CHECK_RAYS = 64
+
+# Dimensions of the random numbers a path draws at every bounce, see
+# ``SAMPLERS``: the jitter of the primary ray, the BSDF sample, the Russian
+# roulette and two for each light (for the ray tracer, two for each grid cell
+# of every area light)
+JITTER_DIMENSION = 0
+BSDF_DIMENSION = 2
+ROULETTE_DIMENSION = 4
+LIGHT_DIMENSION = 5
+
 # LIGHTING
 AMBIENT = RGB(0.5)
 SHININESS = 64
@@ -28,6 +98,111 @@ AMBIENT_WEIGHT = 0.3
 DIFFUSE_WEIGHT = 0.4
 SPECULAR_WEIGHT = 0.4
 
+ACCELERATORS = {
+    "scan": ObjectScan,
+    "bvh": BVH,
+    "grid": UniformGrid,
+}
+
+# Where the random numbers of the paths come from: independent ones, or
+# scrambled Sobol points that stratify the samples of every pixel
+SAMPLERS = {
+    "random": CounterRNG,
+    "sobol": SobolSampler,
+}
+
+# Tracer, frame buffer and cancellation token of a render worker process,
+# set once by init_worker
+worker_tracer = None
+worker_framebuffer = None
+worker_token = None
+worker_setup_time = 0.0
+
+
+def init_worker(scene, framebuffer, token):
+    global worker_tracer, worker_framebuffer, worker_token, worker_setup_time
+
+    start = time.perf_counter()
+    worker_tracer = pickle.loads(scene)
+    worker_framebuffer = framebuffer
+    worker_token = token
+    worker_setup_time = time.perf_counter() - start
+
+
+def worker_aovs():
+    """The ``AOV_PLANES`` the worker's frame buffer holds."""
+    return [name for name in worker_framebuffer.planes if name in AOV_PLANES]
+
+
+def trace_tile_task(tile, block=1, coarser=None):
+    """
+    Renders a tile with the worker's tracer straight into the shared frame
+    buffer and only returns a completion message with the number of pixels
+    traced, fewer than the tile has if the render was cancelled meanwhile.
+    The first task run by each worker also reports how long the worker took
+    to load the scene.
+    """
+    global worker_setup_time
+
+    aovs = worker_aovs()
+    if worker_framebuffer.color is not None:
+        aovs.append("color")
+
+    tile, pixels, colors, planes, counters = worker_tracer.trace_tile(
+        tile, block, coarser, worker_token, aovs
+    )
+    worker_framebuffer.write(pixels, colors, planes)
+
+    setup_time, worker_setup_time = worker_setup_time, 0.0
+    return tile, len(colors), counters, setup_time
+
+
+def path_tile_task(tile, block=1, coarser=None, samples=1, noisy=False):
+    """
+    Path traces ``samples`` more samples per pixel of a tile, or only of the
+    pixels marked in the frame buffer's ``noisy`` plane, and merges them
+    into the accumulation planes of the frame buffer, along with the AOVs it
+    holds. Answers like ``trace_tile_task``, counting every pixel of the
+    tile once the noisy ones are done.
+    """
+    global worker_setup_time
+
+    tile, pixels, radiance, planes, counters = worker_tracer.path_trace_tile(
+        tile,
+        block,
+        coarser,
+        samples,
+        worker_token,
+        worker_aovs(),
+        worker_framebuffer.count,
+        worker_framebuffer.noisy if noisy else None,
+    )
+    worker_framebuffer.accumulate(pixels, radiance, planes)
+
+    count = len(radiance)
+    if noisy and count:
+        count = tile.width * tile.height
+
+    setup_time, worker_setup_time = worker_setup_time, 0.0
+    return tile, count, counters, setup_time
+
+
+def refine_tile_task(tile):
+    """
+    Supersamples the edges of a tile found by the parent, see
+    ``Tracer.refine_tile``. Answers like ``trace_tile_task``, counting the
+    pixels of the tile that are final.
+    """
+    global worker_setup_time
+
+    tile, count, pixels, colors, counters = worker_tracer.refine_tile(
+        tile, worker_framebuffer, worker_token
+    )
+    worker_framebuffer.write(pixels, colors)
+
+    setup_time, worker_setup_time = worker_setup_time, 0.0
+    return tile, count, counters, setup_time
+
 
 class Tracer:
     def __init__(
@@ -37,97 +212,419 @@ class Tracer:
         objects: list[Object3D],
         size=(512, 512),
         model="ray_tracer",
+        accelerator="bvh",
+        aa_samples=RAYS_CASTS_PER_PIXEL,
+        pass_samples=PASS_SAMPLES,
+        seed=0,
+        sampler="sobol",
+        sort_rays=True,
     ):
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler: {sampler}")
+
         self.model = model
+        self.aa_samples = aa_samples
+        self.pass_samples = pass_samples
+        self.seed = seed
+        self.sampler = sampler
+        self.sort_rays = sort_rays
         self.lights = lights
         self.camera = camera
         self.objects = objects
 
-        if self.model == "path_tracer":
-            for light in self.lights:
-                light.corner1 += Vec3(-LIGHT_SOURCE_SIZE, -0.5, -LIGHT_SOURCE_SIZE)
-                light.corner2 += Vec3(LIGHT_SOURCE_SIZE, 0.5, LIGHT_SOURCE_SIZE)
-            self.objects.extend(self.lights)
+        self.accelerator = self.build_accelerator(accelerator)
+        self.albedo = self.material_arrays()
+        self.light_points = [light.grid_points() for light in self.lights]
 
         self.size = size
+        self.clear_outputs()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in RENDER_OUTPUTS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.clear_outputs()
+
+    def clear_outputs(self):
+        """Forgets the ``RENDER_OUTPUTS`` of the last render."""
+        self.render_stats = {}
+        self.render_result = None
+        self.radiance = None
+        self.sample_counts = None
+        self.variance = None
+        self.aovs = {}
+        self.denoise_guides = {}
+        self.denoised = None
         self._img = None
 
-    def ray_generator_row(self, y):
+    @property
+    def antialiased(self):
+        """
+        Whether edges get up to ``aa_samples`` samples after the last pass.
+        The path tracer takes ``pass_samples`` jittered samples of every
+        pixel in each pass instead.
+        """
+        return self.model == "ray_tracer" and self.aa_samples > 1
+
+    def material_arrays(self):
+        """(K, 3) albedo of the objects, by accelerator index."""
+        return np.array([obj.color.rgb for obj in self.objects]).reshape(-1, 3)
+
+    def build_accelerator(self, name):
+        if name not in ACCELERATORS:
+            raise ValueError(f"Unknown accelerator: {name}")
+
+        accelerator = ACCELERATORS[name](self.objects)
+        logger.info(accelerator.report())
+
+        return accelerator
+
+    def ray_generator_tile(self, x0, y0, x1, y1, samples=1, jitter=False, rng=None):
+        """
+        Generates the primary rays of the pixels in [x0, x1) x [y0, y1).
+
+        Rays are laid out pixel by pixel in scanline order, with the
+        ``samples`` rays of a pixel stored contiguously. Without jitter every
+        sample goes through the pixel centre; with jitter each sample gets a
+        uniform random offset inside its pixel.
+        """
+        ys, xs = np.mgrid[y0:y1, x0:x1]
+        return self.ray_generator_pixels(xs.ravel(), ys.ravel(), samples, jitter, rng)
+
+    def ray_generator_pixels(self, xs, ys, samples=1, jitter=False, rng=None):
+        """
+        Generates the primary rays of the given pixels, in the given order.
+        The jitter comes from ``rng``, by default the ``sample_rng`` of the
+        first ``samples`` samples of the pixels.
+        """
         w, h = self.size
 
         width = 2 * tan(radians(self.camera.angle) / 2)
         pixel_width = width / w
 
-        rays = []
-        cy = (y - (h / 2) + 0.5) * pixel_width
-        for x in range(w):
-            cx = (x - (w / 2) + 0.5) * pixel_width
-            direction = (
-                self.camera.forward + self.camera.right * cx + self.camera.up * cy
-            ).normalized()
-            ray = Ray(self.camera.location, direction)
-            rays.append(ray)
+        if jitter:
+            rng = rng if rng is not None else self.sample_rng(xs, ys, samples)
+            offsets = rng.uniform(None, 0, JITTER_DIMENSION, 2)
+
+        xs = np.repeat(xs, samples)
+        ys = np.repeat(ys, samples)
+
+        if not jitter:
+            offsets = np.full((xs.size, 2), 0.5)
+
+        cx = (xs - (w / 2) + offsets[:, 0]) * pixel_width
+        cy = (ys - (h / 2) + offsets[:, 1]) * pixel_width
+
+        directions = (
+            self.camera.forward.__array__
+            + cx[:, None] * self.camera.right.__array__
+            + cy[:, None] * self.camera.up.__array__
+        )
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        origins = np.tile(self.camera.location.__array__, (xs.size, 1))
 
-        return rays
+        return RayBatch(origins, directions, np.stack((xs, ys), axis=1))
+
+    def sample_rng(self, xs, ys, samples=1, first_sample=0):
+        """
+        Random numbers of the ``samples`` paths of every pixel, from the
+        ``sampler``, laid out like the rays of ``ray_generator_pixels`` and
+        numbered from ``first_sample``, given for all the pixels or for each.
+        """
+        w, _ = self.size
+        first_sample = np.broadcast_to(first_sample, np.shape(xs))
+        return SAMPLERS[self.sampler](
+            self.seed,
+            np.repeat(ys * w + xs, samples),
+            np.repeat(first_sample, samples) + np.tile(np.arange(samples), len(xs)),
+        )
+
+    def ray_generator_frame(self, samples=1, jitter=False, rng=None):
+        w, h = self.size
+        return self.ray_generator_tile(0, 0, w, h, samples, jitter, rng)
+
+    def ray_generator_row(self, y):
+        w, _ = self.size
+        return list(self.ray_generator_tile(0, y, w, y + 1))
 
     def ray_collision(self, ray):
-        hitlist = HitList()
-        for obj in self.objects:
-            hitlist.extend(obj.intersection(ray))
+        return self.accelerator.closest_hit(ray)
 
-        if hitlist.empty():
-            return None
+    def occluded(self, origin, direction, t_max):
+        """
+        Shadow query: tells whether anything lies along ``direction`` from
+        ``origin`` closer than ``t_max``, stopping at the first blocker.
+        """
+        return self.accelerator.any_hit(Ray(origin, direction), EPSILON, t_max)
+
+    def intersect_batch(
+        self, origins, directions, t_min=EPSILON, t_max=np.inf, incoherent=False
+    ):
+        """
+        ``intersect_batch`` of the accelerator. With ``sort_rays``, rays
+        flagged ``incoherent`` (those of the bounces, scattered all over the
+        scene) are traversed in ``coherent_order`` instead, so that each
+        packet visits fewer nodes, and the results put back in their order.
+        """
+        if not (incoherent and self.sort_rays) or len(origins) < 2:
+            return self.accelerator.intersect_batch(origins, directions, t_min, t_max)
+
+        order = coherent_order(origins, directions)
+        sorted_t, sorted_index, sorted_normals = self.accelerator.intersect_batch(
+            origins[order],
+            directions[order],
+            t_min,
+            t_max[order] if np.ndim(t_max) else t_max,
+        )
+
+        t, index = np.empty_like(sorted_t), np.empty_like(sorted_index)
+        normals = np.empty_like(sorted_normals)
+        t[order], index[order], normals[order] = sorted_t, sorted_index, sorted_normals
+        return t, index, normals
 
-        return hitlist.nearest_hit()
+    def sample_lights(self, points, normals, rng, paths, bounce):
+        """
+        Next event estimation: samples a point on every light, casts a
+        shadow ray towards it and returns the (N, 3) light reaching the
+        ``points``, as the product of color and cosine POV-Ray lights give.
+        Area light samples are weighted against BSDF sampling, which may
+        also hit them (see ``light_emission``). The points are those of the
+        ``paths`` of ``rng`` at ``bounce``.
+        """
+        light = np.zeros_like(points)
+
+        for i, source in enumerate(self.lights):
+            u = rng.uniform(paths, bounce, LIGHT_DIMENSION + 2 * i, 2)
+            targets = source.sample_points(u)
+            to_light = targets - points
+            distances = np.linalg.norm(to_light, axis=1)
+            to_light /= distances[:, None]
+
+            cosines = np.einsum("ij,ij->i", to_light, normals)
+            lit = np.flatnonzero(cosines > 0)
+            _, index, _ = self.intersect_batch(
+                points[lit],
+                to_light[lit],
+                EPSILON,
+                distances[lit] - EPSILON,
+                incoherent=bounce > 0,
+            )
+            lit = lit[index < 0]
+
+            weights = cosines[lit]
+            if source.is_area:
+                light_pdf = self.area_light_pdf(source, to_light[lit], distances[lit])
+                bsdf_pdf = cosine_hemisphere_pdf(to_light[lit], normals[lit])
+                weights = weights * power_heuristic(light_pdf, bsdf_pdf)
+
+            light[lit] += weights[:, None] * source.color.rgb
+
+        return light
+
+    @staticmethod
+    def area_light_pdf(source, directions, distances):
+        """Solid angle pdf of sampling ``directions`` uniformly on ``source``."""
+        normal = source.axis1.cross(source.axis2).normalized().__array__
+        cosines = np.abs(directions @ normal)
+        with np.errstate(divide="ignore"):
+            return distances**2 / (source.area * cosines)
+
+    def light_emission(self, origins, directions, t_max, bsdf_pdf):
+        """
+        Light of the area lights that BSDF sampled rays hit before ``t_max``,
+        weighted against next event estimation. A POV-Ray area light lights
+        a point like its uniformly sampled points do; the radiance that does
+        the same when the light is hit is pi * color * (light pdf).
+        """
+        emission = np.zeros_like(origins)
+
+        for source in self.lights:
+            if not source.is_area:
+                continue
+
+            center = source.location.__array__
+            axis1, axis2 = source.axis1.__array__, source.axis2.__array__
+            normal = np.cross(axis1, axis2)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = ((center - origins) @ normal) / (directions @ normal)
+            offsets = origins + directions * t[:, None] - center
+            hit = (
+                (t > EPSILON)
+                & (t < t_max)
+                & (np.abs(offsets @ axis1) <= axis1 @ axis1 / 2)
+                & (np.abs(offsets @ axis2) <= axis2 @ axis2 / 2)
+            )
 
-    # TODO: Fix this function
-    def path_trace(self, ray):
-        incoming_light = RGB(0)
-        ray_color = RGB(1)
+            light_pdf = self.area_light_pdf(source, directions[hit], t[hit])
+            weights = np.pi * light_pdf * power_heuristic(bsdf_pdf[hit], light_pdf)
+            emission[hit] += weights[:, None] * source.color.rgb
 
-        for _ in range(MAX_BOUNCES + 1):
-            hit = self.ray_collision(ray)
-            if hit is None:
+        return emission
+
+    def path_trace(self, rays, rng=None, token=None, aovs=False):
+        """
+        Wavefront path tracer: all the paths of ``rays`` advance together,
+        one bounce at a time, as batched intersect, shade and sample stages.
+        Paths that leave the scene or lose the Russian roulette are
+        compacted away between bounces.
+
+        Surfaces are Lambertian. Every hit samples the lights directly (next
+        event estimation) and bounces towards a cosine-weighted direction of
+        the hemisphere around the normal; area lights found that way are
+        combined with the direct samples by multiple importance sampling.
+        Like in POV-Ray, lights are not seen by the camera.
+
+        The random numbers of every path come from its stream of ``rng``,
+        one of the ``SAMPLERS`` laid out like ``rays``, so a path traces the
+        same whichever paths it is traced with.
+
+        Returns:
+            np.ndarray: (N, 3) radiance of every ray, or None if ``token``
+            got cancelled first. With ``aovs``, also the ``AOV_PLANES`` of
+            the first hit of every ray, as a {name: values} dict.
+        """
+        if rng is None:
+            rng = SAMPLERS[self.sampler](
+                self.seed, np.zeros(len(rays)), np.arange(len(rays))
+            )
+
+        radiance = np.zeros((len(rays), 3))
+        paths = np.arange(len(rays))
+        origins, directions = rays.origins, rays.directions
+        throughput = np.ones((len(rays), 3))
+        pdfs = None
+
+        first_hits = miss_planes(AOV_PLANES, len(rays)) if aovs else None
+
+        for bounce in range(MAX_BOUNCES + 1):
+            if token is not None and token.is_cancelled():
+                return (None, None) if aovs else None
+
+            # Intersect
+            t, index, normals = self.intersect_batch(
+                origins, directions, incoherent=bounce > 0
+            )
+            if bounce:
+                radiance[paths] += throughput * self.light_emission(
+                    origins, directions, t, pdfs
+                )
+
+            alive = index >= 0
+            paths, origins, directions = paths[alive], origins[alive], directions[alive]
+            throughput, t, index = throughput[alive], t[alive], index[alive]
+            normals = normals[alive]
+
+            if not paths.size:
                 break
 
-            ray.origin = ray.at(hit.t)
+            # Shade
+            normals /= np.linalg.norm(normals, axis=1)[:, None]
+            normals *= -np.sign(np.einsum("ij,ij->i", normals, directions))[:, None]
+            origins = origins + directions * t[:, None] + normals * EPSILON
 
-            # Lambertian reflection
-            ray.direction = Vec3.random_hemisphere_direction(hit.normal)
+            albedo = self.albedo[index]
+            if aovs and not bounce:
+                first_hits["depth"][paths] = t
+                first_hits["normal"][paths] = normals
+                first_hits["albedo"][paths] = albedo
+                first_hits["ids"][paths] = index
+                first_hits["hits"][paths] = 1
 
-            if isinstance(hit.obj, LightSource):
-                incoming_light += hit.obj.color * ray_color
-                ray_color *= RGB(0)
-            else:
-                ray_color *= hit.obj.color
+            radiance[paths] += (
+                throughput
+                * albedo
+                * self.sample_lights(origins, normals, rng, paths, bounce)
+            )
+
+            if bounce == MAX_BOUNCES:
+                break
+
+            # Sample the next direction: the cosine / pi pdf cancels the
+            # cosine and the albedo / pi of the Lambertian BRDF
+            directions, pdfs = cosine_hemisphere(
+                normals, rng.uniform(paths, bounce, BSDF_DIMENSION, 2)
+            )
+            throughput = throughput * albedo
 
-        return incoming_light
+            if bounce + 1 >= RUSSIAN_ROULETTE_DEPTH:
+                survival = np.minimum(throughput.max(axis=1), 1)
+                u = rng.uniform(paths, bounce, ROULETTE_DIMENSION)[:, 0]
+                alive = u < survival
+                throughput = throughput[alive] / survival[alive, None]
+                paths, origins, directions = (
+                    paths[alive],
+                    origins[alive],
+                    directions[alive],
+                )
+                pdfs = pdfs[alive]
+
+            if not paths.size:
+                break
+
+        return (radiance, first_hits) if aovs else radiance
+
+    def light_samples(self, rng):
+        """
+        (N, D) random numbers of the ``rng`` paths that place the shadow
+        rays of the ray tracer within the grid cells of the area lights, or
+        None if there are none (see ``calculate_lighting``).
+        """
+        dimensions = 2 * sum(
+            len(points)
+            for light, points in zip(self.lights, self.light_points)
+            if light.is_area
+        )
+        if not dimensions:
+            return None
+        return rng.uniform(None, 0, LIGHT_DIMENSION, dimensions)
 
-    def ray_trace(self, ray):
+    def ray_trace(self, ray, light_u=None):
         hit = self.ray_collision(ray)
         if hit is None:
             return RGB(0)
-        return self.calculate_lighting(ray, hit)
+        return self.calculate_lighting(ray, hit, light_u)
 
-    def calculate_lighting(self, ray, hit):
+    def calculate_lighting(self, ray, hit, light_u=None):
         diffuse = RGB(0)
         specular = RGB(0)
 
         view_vector = -ray.direction
 
-        for light in self.lights:
-            light_vector = (light.location - ray.at(hit.t)).normalized()
-            halfway_vector = (view_vector + light_vector).normalized()
+        # Shadow rays leave from just above the side of the surface facing the
+        # viewer, so that they do not hit the surface they start on
+        facing_normal = hit.normal * -sign(hit.normal.dot(ray.direction))
+        shadow_origin = ray.at(hit.t) + facing_normal * EPSILON
+
+        # Area lights are an average of point lights spread over their grid,
+        # one in each cell: jittered by the ``light_u`` of the ray (see
+        # ``light_samples``) or at the centres without them
+        offset = 0
+        for light, points in zip(self.lights, self.light_points):
+            color = light.color / len(points)
+            if light_u is not None and light.is_area:
+                jitter = light_u[offset : offset + 2 * len(points)]
+                offset += 2 * len(points)
+                points = light.grid_points(jitter.reshape(-1, 2))
 
-            light_ray = Ray(light.location, -light_vector)
-            light_hit = self.ray_collision(light_ray)
+            for point in points:
+                to_light = point - shadow_origin
+                light_distance = to_light.mag()
+                light_vector = to_light / light_distance
+                halfway_vector = (view_vector + light_vector).normalized()
 
-            if light_ray.at(light_hit.t).round(6) == ray.at(hit.t).round(6):
-                diffuse_strength = max(0, hit.normal.dot(light_vector))
-                diffuse += diffuse_strength * light.color
+                if not self.occluded(shadow_origin, light_vector, light_distance):
+                    diffuse_strength = max(0, hit.normal.dot(light_vector))
+                    diffuse += diffuse_strength * color
 
-                specular_strength = max(0, hit.normal.dot(halfway_vector)) ** SHININESS
-                specular += specular_strength * light.color
+                    specular_strength = (
+                        max(0, hit.normal.dot(halfway_vector)) ** SHININESS
+                    )
+                    specular += specular_strength * color
 
         lighting = (
             AMBIENT * AMBIENT_WEIGHT
@@ -137,44 +634,563 @@ class Tracer:
 
         return (hit.obj.color * lighting).limit()
 
-    def trace(self, ray):
+    def trace(self, ray, light_u=None):
         match self.model:
             case "ray_tracer":
-                return self.ray_trace(ray)
+                return self.ray_trace(ray, light_u)
             case "path_tracer":
-                return self.path_trace(ray)
+                rays = RayBatch(
+                    ray.origin.__array__[None], ray.direction.__array__[None]
+                )
+                return RGB(list(self.path_trace(rays)[0]))
             case _:
                 raise ValueError(f"Unknown model: {self.model}")
 
-    def trace_row(self, y):
-        rays = self.ray_generator_row(y)
-        row_colors = []
+    def trace_sample(self, ray, light_u=None):
+        """Traces a primary ray, also returning its first hit (None if none)."""
+        hit = self.ray_collision(ray)
 
-        for ray in rays:
-            pixel_color = self.trace(ray)
-            row_colors.append(pixel_color.as_rgb8())
+        if self.model == "ray_tracer":
+            color = (
+                RGB(0) if hit is None else self.calculate_lighting(ray, hit, light_u)
+            )
+        else:
+            color = self.trace(ray)
 
-        return y, row_colors
+        return color, hit
 
-    @timer
-    def trace_scene(self):
+    def trace_tile(self, tile, block=1, coarser=None, token=None, aovs=()):
+        """
+        Traces the pixels of a tile on the ``block`` lattice, except those
+        already traced on the ``coarser`` one (see ``Tile.pixels``). When
+        ``token`` gets cancelled the tile is left unfinished.
+
+        The ``aovs``, names of ``AOV_PLANES``, are filled from the first hit
+        of every pixel; without them the primary rays are traced as usual.
+        Asking for ``color`` too also returns the colors before rounding.
+
+        Returns:
+            tuple: the tile, the (rows, columns) of the traced pixels, their
+            (N, 3) RGB8 colors, their ``aovs`` as a {name: values} dict (None
+            if there are none) and the traversal counters.
+        """
+        ys, xs = tile.pixels(block, coarser)
+        rays = self.ray_generator_pixels(xs, ys)
+        light_u = self.light_samples(self.sample_rng(xs, ys))
+        colors = np.empty((len(rays), 3), dtype=np.uint8)
+
+        if aovs:
+            object_ids = {id(obj): i for i, obj in enumerate(self.objects)}
+            planes = miss_planes(aovs, len(rays))
+
+        traced = len(rays)
+        for i, ray in enumerate(rays):
+            if token is not None and i % CANCEL_CHECK_RAYS == 0:
+                if token.is_cancelled():
+                    traced = i
+                    break
+
+            u = None if light_u is None else light_u[i]
+            if not aovs:
+                colors[i] = self.trace(ray, u).as_rgb8()
+                continue
+
+            color, hit = self.trace_sample(ray, u)
+            colors[i] = color.as_rgb8()
+            if hit is not None:
+                values = {
+                    "depth": hit.t,
+                    "normal": (
+                        hit.normal * -sign(hit.normal.dot(ray.direction))
+                    ).__array__,
+                    "albedo": hit.obj.color.rgb,
+                    "ids": object_ids.get(id(hit.obj), -1),
+                    "hits": 1,
+                    "color": color.rgb,
+                }
+                for name in aovs:
+                    planes[name][i] = values[name]
+
+        return (
+            tile,
+            (ys[:traced], xs[:traced]),
+            colors[:traced],
+            (
+                {name: values[:traced] for name, values in planes.items()}
+                if aovs
+                else None
+            ),
+            self.accelerator.pop_counters(),
+        )
+
+    def path_trace_tile(
+        self,
+        tile,
+        block=1,
+        coarser=None,
+        samples=1,
+        token=None,
+        aovs=(),
+        sample_counts=None,
+        mask=None,
+    ):
+        """
+        ``trace_tile`` for the path tracer: ``samples`` jittered paths for
+        every pixel of the tile, or only for those set in the (H, W) boolean
+        ``mask``, go through ``path_trace`` as one wavefront. A cancelled
+        tile comes back empty.
+
+        The new samples of a pixel are numbered after the ones it already
+        has in the (H, W) ``sample_counts``, so that its random numbers only
+        depend on the seed, the pixel and the sample.
+
+        The ``aovs`` of a pixel are those of its nearest first hit, except
+        for the ``normal`` and ``albedo``, averaged over its samples, and the
+        ``hits``, counted.
+
+        Returns:
+            tuple: the tile, the (rows, columns) of the traced pixels, their
+            (N, samples, 3) radiance samples, their ``aovs`` as in
+            ``trace_tile`` and the traversal counters.
+        """
+        ys, xs = tile.pixels(block, coarser)
+        if mask is not None:
+            keep = mask[ys, xs]
+            ys, xs = ys[keep], xs[keep]
+        first_sample = 0 if sample_counts is None else sample_counts[ys, xs]
+        rng = self.sample_rng(xs, ys, samples, first_sample)
+        rays = self.ray_generator_pixels(xs, ys, samples, True, rng)
+
+        radiance, first_hits = self.path_trace(rays, rng, token, bool(aovs)), None
+        if aovs:
+            radiance, first_hits = radiance
+        if radiance is None:
+            ys, xs = ys[:0], xs[:0]
+            radiance = np.zeros((0, 3))
+
+        planes = None
+        if aovs and len(ys):
+            first_hits = {
+                name: values.reshape(len(ys), samples, *values.shape[1:])
+                for name, values in first_hits.items()
+            }
+            nearest = first_hits["depth"].argmin(axis=1)[:, None]
+            reductions = {
+                "depth": lambda values: np.take_along_axis(values, nearest, 1)[:, 0],
+                "ids": lambda values: np.take_along_axis(values, nearest, 1)[:, 0],
+                "normal": lambda values: values.mean(axis=1),
+                "albedo": lambda values: values.mean(axis=1),
+                "hits": lambda values: values.sum(axis=1),
+            }
+            planes = {name: reductions[name](first_hits[name]) for name in aovs}
+
+        return (
+            tile,
+            (ys, xs),
+            radiance.reshape(len(ys), samples, 3),
+            planes,
+            self.accelerator.pop_counters(),
+        )
+
+    def refine_tile(self, tile, framebuffer, token=None):
+        """
+        Adds ``aa_samples - 1`` jittered samples to the pixels of a tile
+        marked in ``framebuffer.edges`` and averages them with the one they
+        already have, whose color before rounding to RGB8 the first pass
+        left in ``framebuffer.color``. Pixels are refined in scanline order;
+        when ``token`` gets cancelled the rest keep their single sample.
+
+        Returns:
+            tuple: the tile, how many of its pixels (in scanline order) are
+            final, the (rows, columns) of the refined pixels, their (N, 3)
+            RGB8 colors and the traversal counters.
+        """
+        ys, xs = np.nonzero(framebuffer.edges[tile.slices])
+        ys, xs = ys + tile.y0, xs + tile.x0
+
+        samples = self.aa_samples - 1
+        rng = self.sample_rng(xs, ys, samples, 1)
+        rays = self.ray_generator_pixels(xs, ys, samples, jitter=True, rng=rng)
+        light_u = self.light_samples(rng)
+        totals = framebuffer.color[ys, xs].astype(np.float64)
+
+        traced = len(rays)
+        for i, ray in enumerate(rays):
+            if token is not None and i % CANCEL_CHECK_RAYS == 0:
+                if token.is_cancelled():
+                    traced = i
+                    break
+
+            u = None if light_u is None else light_u[i]
+            totals[i // samples] += self.trace(ray, u).rgb
+
+        refined = traced // samples
+        colors = np.clip(totals[:refined] / self.aa_samples, 0, 1) * 255
+
+        count = tile.width * tile.height
+        if refined < len(ys):
+            count = (ys[refined] - tile.y0) * tile.width + xs[refined] - tile.x0
+
+        return (
+            tile,
+            count,
+            (ys[:refined], xs[:refined]),
+            colors.astype(np.uint8),
+            self.accelerator.pop_counters(),
+        )
+
+    def worker_payload(self):
+        """
+        The pickled tracer, sent once to every render worker: the scene and
+        the settings, without the outputs of previous renders.
+        """
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def render_stages(self, passes, framebuffer, tiles, target_error, sample_cap):
+        """
+        Lists the stages of a render as ``(task, block, coarser, args,
+        tiles)``: one per lattice of ``passes``, the anti-aliasing of the
+        edges if any and, for the path tracer, as many extra sample passes as
+        it takes to bring every pixel under ``target_error``. Each stage is
+        only decided once the previous ones are done.
+
+        Whether a pixel gets more samples only depends on the error around
+        it over the whole image, never on the tile it falls in, so the
+        samples of every pixel do not depend on the tile size either.
+        """
+        path_tracer = self.model == "path_tracer"
+
+        for block, coarser in passes:
+            if path_tracer:
+                args = (block, coarser, self.pass_samples)
+                yield path_tile_task, block, coarser, args, tiles
+            else:
+                yield trace_tile_task, block, coarser, (block, coarser), tiles
+
+        if self.antialiased:
+            framebuffer.edges[:] = contrast_mask(
+                framebuffer.image, framebuffer.depth, framebuffer.ids
+            )
+            logger.info(
+                f"anti-aliasing {framebuffer.edges.sum()} edge pixels "
+                f"with {self.aa_samples} samples"
+            )
+            yield refine_tile_task, 1, None, (), tiles
+
+        if not path_tracer or target_error is None:
+            return
+
+        # Every extra pass doubles the samples of the pixels still too noisy
+        samples = self.pass_samples
+        while True:
+            error = framebuffer.relative_error(ERROR_FLOOR, ERROR_RADIUS)
+            framebuffer.noisy[:] = (error > target_error) & (
+                framebuffer.count + samples <= sample_cap
+            )
+            noisy = [tile for tile in tiles if framebuffer.noisy[tile.slices].any()]
+            if not noisy:
+                return
+
+            logger.info(
+                f"{framebuffer.noisy.sum()} pixels in {len(noisy)} tiles above "
+                f"{target_error} error, +{samples} spp"
+            )
+            yield path_tile_task, 1, None, (1, None, samples, True), noisy
+            samples *= 2
+
+    def render_passes(
+        self,
+        passes,
+        tile_size=TILE_SIZE,
+        order="spiral",
+        max_in_flight=None,
+        workers=None,
+        buffer=None,
+        on_tile=None,
+        token=None,
+        target_error=TARGET_ERROR,
+        sample_cap=MAX_PIXEL_SAMPLES,
+        denoise=False,
+        aovs=(),
+        mp_context=None,
+    ):
+        """
+        Renders the scene with a pool of worker processes, in one or more
+        passes over all the tiles.
+
+        Each pass is a ``(block, coarser)`` pair: it traces the pixels on the
+        ``block`` lattice that the previous pass, on the ``coarser`` one, did
+        not. After every pass the image is updated, with each pixel taking
+        the color of the traced pixel at the corner of its block, and the
+        block size is yielded. If the tracer is ``antialiased`` a last pass
+        then supersamples the pixels on edges, see ``refine_tile``, and yields
+        a block size of 1 again.
+
+        The path tracer accumulates the mean and variance of the samples of
+        every pixel instead, and keeps adding passes over the pixels whose
+        relative error is above ``target_error`` until none is left or they
+        would go over ``sample_cap`` samples. Each of these passes yields a
+        block size of 1 too.
+
+        Args:
+            passes (list[tuple[int, int | None]]): Lattices of the passes.
+            tile_size (int | tuple[int]): Side, or (width, height), of the tiles.
+            order (str): Tile order, one of ``TILE_ORDERS``.
+            max_in_flight (int): Maximum number of tiles submitted at once.
+            workers (int): Number of worker processes, one per CPU by default.
+            buffer: Optional (height, width, 3) RGB8 destination for the
+                image, see ``FrameBuffer``.
+            on_tile (callable): Called as ``on_tile(tile, done, total,
+                image)`` after every finished tile, with the number of tiles
+                done and to do over all passes and the frame buffer pixels.
+                The path tracer may add tiles to do as it goes.
+            token (CancellationToken): Stops the render once cancelled or
+                past its deadline: pending tiles are dropped, the tiles being
+                traced are left unfinished and no more passes are run. The
+                image is then the last finished pass with every pixel traced
+                since laid over it.
+            target_error (float | None): Relative standard error the path
+                tracer aims for, None to stop after ``passes``.
+            sample_cap (int): Maximum number of path traced samples per pixel.
+            denoise (bool): Whether the path tracer records the denoiser
+                guides, ``DENOISE_PLANES``, and once the render is complete
+                replaces the image with the ``denoised`` radiance. Passes
+                still yield the noisy image.
+            aovs (tuple[str]): ``AOV_PLANES`` to fill along with the image,
+                see ``trace_tile`` and ``path_trace_tile``.
+            mp_context: ``multiprocessing`` context the workers are started
+                with, the platform default if None, that ``token`` must have
+                been made with too. A process that already runs threads,
+                like the GTK viewer, must not fork them.
+
+        The outcome is left in ``render_result``, and the AOVs asked for in
+        ``aovs`` as full-size arrays; the path tracer also leaves its float
+        ``radiance``, the ``variance`` of that mean, the ``sample_counts`` of
+        the pixels and, with ``denoise``, the ``denoise_guides``.
+        """
         w, h = self.size
-        img_array = np.zeros((h, w, 3), dtype=np.uint8)
+        counters = self.accelerator.pop_counters()
+        token = token if token is not None else CancellationToken(context=mp_context)
+        render_start = time.perf_counter()
+
+        scheduler = TileScheduler(self.size, tile_size, order, max_in_flight)
+        logger.info(scheduler)
+
+        workers = workers or os.cpu_count() or 1
+
+        start = time.perf_counter()
+        scene = self.worker_payload()
+        setup_time = time.perf_counter() - start
+
+        unknown = set(aovs) - set(AOV_PLANES)
+        if unknown:
+            raise ValueError(f"Unknown AOVs: {', '.join(sorted(unknown))}")
+
+        planes = tuple(aovs)
+        if self.antialiased:
+            planes += GUIDE_PLANES
+        if self.model == "path_tracer":
+            planes += ACCUMULATION_PLANES + (DENOISE_PLANES if denoise else ())
+            if target_error is not None:
+                planes += ("noisy",)
 
-        with ProcessPoolExecutor() as executor:
-            futures = {executor.submit(self.trace_row, y): y for y in range(h)}
+        planned = len(passes) + self.antialiased
+        done, partial, total = 0, 0, len(scheduler) * planned
+        finished_passes, stopped, tiles_sent = 0, False, 0
+        traced = np.zeros((h, w), dtype=bool)
+        image_block = None
 
-            for future in as_completed(futures):
-                y, row_colors = future.result()
-                img_array[y, :] = row_colors
+        def preview(block):
+            image = framebuffer.image[::block, ::block]
+            return image.repeat(block, axis=0).repeat(block, axis=1)[:h, :w]
 
-        self._img = Image.fromarray(img_array, "RGB")
+        framebuffer = FrameBuffer(self.size, buffer, planes)
+        try:
+            with ProcessPoolExecutor(
+                workers,
+                mp_context=mp_context,
+                initializer=init_worker,
+                initargs=(scene, framebuffer.shared_view(), token),
+            ) as executor:
+                stages = self.render_stages(
+                    passes, framebuffer, scheduler.tiles, target_error, sample_cap
+                )
+                for task, block, coarser, args, tiles in stages:
+                    if finished_passes >= planned:
+                        total += len(tiles)
+                    tiles_sent += len(tiles)
+                    stage_done = 0
+
+                    for tile, count, tile_counters, worker_setup in scheduler.run(
+                        executor, task, *args, cancelled=token.is_cancelled, tiles=tiles
+                    ):
+                        framebuffer.commit(tile)
+                        setup_time += worker_setup
+                        for key, value in tile_counters.items():
+                            counters[key] += value
+
+                        ys, xs = tile.pixels(block, coarser)
+                        traced[ys[:count], xs[:count]] = True
+                        if count < len(ys):
+                            partial += count > 0
+                            continue
+
+                        done += 1
+                        stage_done += 1
+                        if on_tile is not None:
+                            on_tile(tile, done, total, framebuffer.image)
+
+                    if stage_done < len(tiles):
+                        stopped = True
+                        break
+
+                    finished_passes += 1
+                    image_block = block
+                    self._img = Image.fromarray(preview(block).copy(), "RGB")
+
+                    yield block
+
+                if stopped:
+                    if image_block is not None:
+                        image = preview(image_block).copy()
+                    else:
+                        image = np.zeros((h, w, 3), dtype=np.uint8)
+                    image[traced] = framebuffer.image[traced]
+                    self._img = Image.fromarray(image, "RGB")
+
+            if framebuffer.count is not None:
+                self.radiance = framebuffer.mean.copy()
+                self.sample_counts = framebuffer.count.copy()
+
+                # A single sample tells nothing of the noise, assume the worst
+                count = self.sample_counts[..., None].astype(np.float64)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    self.variance = np.where(
+                        count > 1,
+                        framebuffer.m2 / (count * (count - 1)),
+                        self.radiance**2,
+                    )
+            self.aovs = {name: getattr(framebuffer, name).copy() for name in aovs}
+            self.denoise_guides = {}
+            if self.model == "path_tracer" and denoise:
+                self.denoise_guides = {
+                    name: getattr(framebuffer, name).copy() for name in DENOISE_PLANES
+                }
+        finally:
+            framebuffer.close()
+
+        # Not measured: the scene once per worker and a pickled tile per
+        # task, leaving out the task arguments and the executor's framing
+        tile_bytes = len(pickle.dumps(scheduler.tiles[0]))
+        self.render_stats = {
+            "scene_bytes": len(scene),
+            "workers": workers,
+            "estimated_bytes_sent": len(scene) * workers + tiles_sent * tile_bytes,
+            "setup_time": setup_time,
+            "rays": counters["rays"],
+            "visits": counters["visits"],
+            "steps": counters["steps"],
+        }
+        if self.model == "path_tracer":
+            self.render_stats["samples_per_pixel"] = float(self.sample_counts.mean())
+            if denoise and not stopped:
+                start = time.perf_counter()
+                self.denoise_image()
+                self.render_stats["denoise_time"] = time.perf_counter() - start
 
-    def draw_on(self, views, container_size):
+        self.render_result = RenderResult(
+            self._img,
+            token.reason if stopped else None,
+            finished_passes,
+            max(planned, finished_passes + stopped),
+            done,
+            partial,
+            total,
+            int(traced.sum()),
+            w * h,
+            time.perf_counter() - render_start,
+            self.render_stats,
+        )
+
+        logger.info(self.accelerator.report(counters))
+        logger.info(
+            f"scene: {len(scene)} bytes to {workers} workers, "
+            f"about {self.render_stats['estimated_bytes_sent']} bytes sent, "
+            f"setup: {setup_time:.3f} s"
+        )
+        logger.info(self.render_result)
+
+    def denoise_image(self):
+        """
+        Filters the last path traced ``radiance`` with ``denoise``, guided by
+        the ``denoise_guides`` of a render with ``denoise`` on. The result is
+        kept in ``denoised`` and becomes the image.
+        """
+        self.denoised = denoise(self.radiance, self.variance, **self.denoise_guides)
+        self._img = Image.fromarray(
+            (np.clip(self.denoised, 0, 1) * 255).astype(np.uint8), "RGB"
+        )
+        return self._img
+
+    @staticmethod
+    def render_token(token=None, timeout=None, mp_context=None):
+        if token is None:
+            token = CancellationToken(context=mp_context)
+        if timeout is not None:
+            token.set_timeout(timeout)
+        return token
+
+    @timer
+    def trace_scene(self, token=None, timeout=None, **kwargs):
+        """
+        Renders the scene in a single pass, see ``render_passes``.
+
+        Args:
+            token (CancellationToken): Lets the caller stop the render.
+            timeout (float): Time budget in seconds, after which the render
+                stops with whatever it has.
+
+        Returns:
+            RenderResult: the image and what was rendered.
+        """
+        token = self.render_token(token, timeout, kwargs.get("mp_context"))
+        for _ in self.render_passes([(1, None)], token=token, **kwargs):
+            pass
+
+        return self.render_result
+
+    def trace_progressive(
+        self, block_size=PROGRESSIVE_BLOCK, token=None, timeout=None, **kwargs
+    ):
+        """
+        Renders the scene coarse to fine: a first pass traces one pixel per
+        ``block_size`` x ``block_size`` block and every following pass
+        halves the block, tracing only the pixels not traced yet. With a
+        ``token`` or a ``timeout`` the refinement stops when they say so,
+        see ``render_result`` for the best image reached.
+
+        Yields:
+            tuple[int, Image.Image]: the block size of the pass just finished
+            and the full-size image after it.
+        """
+        if block_size < 1 or block_size & (block_size - 1):
+            raise ValueError("The block size must be a power of two")
+
+        passes = [(block_size, None)]
+        while passes[-1][0] > 1:
+            passes.append((passes[-1][0] // 2, passes[-1][0]))
+
+        token = self.render_token(token, timeout, kwargs.get("mp_context"))
+        for block in self.render_passes(passes, token=token, **kwargs):
+            yield block, self._img
+
+    def draw_on(self, views, container_size, image=None):
+        """Draws the rendered image, or a partial ``image``, on the Tracer view."""
         root = views["Tracer"]["canvas"].get_root_item()
+        image = image if image is not None else self._img
 
         buffer = BytesIO()
-        self._img.save(buffer, format="PNG")
+        image.save(buffer, format="PNG")
         buffer.seek(0)
         image_data = buffer.read()
 
@@ -220,6 +1236,27 @@ class Tracer:
             y=y_pos,
         )
 
+    def save_aovs(self, filename: str):
+        """
+        Saves the AOVs of the last render next to the image ``filename``: a
+        ``.npz`` name gets them all in one compressed archive, any other
+        one a ``.npy`` per AOV, named like ``image.depth.npy``.
+        """
+        if not self.aovs:
+            raise ValueError(
+                "No hay AOVs guardados. Renderiza con el parámetro aovs primero."
+            )
+
+        stem, extension = os.path.splitext(filename)
+        if extension == ".npz":
+            np.savez_compressed(filename, **self.aovs)
+            print(f"AOVs guardados exitosamente en {filename}")
+            return
+
+        for name, values in self.aovs.items():
+            np.save(f"{stem}.{name}.npy", values)
+        print(f"AOVs guardados exitosamente en {stem}.*.npy")
+
     def to_png(self, filename: str):
         if self._img is not None:
             try:
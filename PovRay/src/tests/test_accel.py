@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from pathlib import Path
+
+pytest.importorskip("gi")
+
+from povview.parser import Parser
+from povview.accel.bvh import BVH
+from povview.accel.grid import GRID_DENSITY, UniformGrid
+from povview.accel.scan import ObjectScan
+from povview.math.tracing import Ray
+from povview.math.vector import Vec3
+
+SCENES = Path(__file__).resolve().parents[2]
+RAYS = 400
+SCALAR_RAYS = 60
+
+
+@pytest.fixture(scope="module", params=["sphere", "box", "rubik", "robot"])
+def scene(request):
+    parsed_file = Parser().parse(str(SCENES / f"{request.param}.pov"))
+    objects = parsed_file["objects"]
+
+    bounds = np.array([obj.bounds() for obj in objects], dtype=np.float64)
+    box_min, box_max = bounds[:, 0].min(axis=0), bounds[:, 1].max(axis=0)
+
+    # Half of the rays leave the camera, the others start inside the scene,
+    # all of them aimed at random points of its bounding box
+    rng = np.random.default_rng(0)
+    camera = np.asarray(parsed_file["cameras"][0].location.__array__)
+    inside = box_min + rng.random((RAYS, 3)) * (box_max - box_min)
+    origins = np.where(np.arange(RAYS)[:, None] % 2, inside, camera)
+    targets = box_min + rng.random((RAYS, 3)) * (box_max - box_min)
+    directions = targets - origins
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+
+    return objects, origins, directions, ObjectScan(objects)
+
+
+@pytest.mark.parametrize("accelerator", [BVH, UniformGrid])
+def test_batched_closest_hits_match_the_scan(scene, accelerator):
+    objects, origins, directions, scan = scene
+    expected_t, expected_index, expected_normals = scan.intersect_batch(
+        origins, directions
+    )
+    assert (expected_index >= 0).any()
+
+    t, index, normals = accelerator(objects).intersect_batch(origins, directions)
+
+    np.testing.assert_allclose(t, expected_t, rtol=1e-9)
+    np.testing.assert_array_equal(index, expected_index)
+    np.testing.assert_allclose(normals, expected_normals, atol=1e-9)
+
+
+@pytest.mark.parametrize("accelerator", [BVH, UniformGrid])
+def test_scalar_queries_match_the_scan(scene, accelerator):
+    objects, origins, directions, scan = scene
+    structure = accelerator(objects)
+
+    for origin, direction in zip(origins[:SCALAR_RAYS], directions[:SCALAR_RAYS]):
+        ray = Ray(Vec3(origin), Vec3(direction))
+        expected = scan.closest_hit(ray)
+        hit = structure.closest_hit(ray)
+
+        if expected is None:
+            assert hit is None
+        else:
+            assert hit is not None and hit.obj is expected.obj
+            assert hit.t == pytest.approx(expected.t, rel=1e-9)
+
+        assert structure.any_hit(ray) == scan.any_hit(ray)
+
+
+def test_grid_has_a_few_cells_per_primitive(scene):
+    objects, *_ = scene
+    grid = UniformGrid(objects)
+
+    assert grid.stats["cells"] >= GRID_DENSITY * len(grid.table) / 2
@@ -0,0 +1,54 @@
+import pickle
+import numpy as np
+import pytest
+
+from povview.framebuffer import FrameBuffer
+from povview.tiles import Tile
+
+SIZE = (8, 6)
+
+
+@pytest.fixture
+def target():
+    return np.zeros((6, 8, 3), dtype=np.uint8)
+
+
+def test_shared_view_hides_the_callers_buffer(target):
+    framebuffer = FrameBuffer(SIZE, target, planes=("depth",))
+    try:
+        view = framebuffer.shared_view()
+        assert view.target is None
+        assert view.image is view.array
+        assert not view._owner and not view._plane_owner
+
+        view.write((np.array([1]), np.array([2])), [10, 20, 30], {"depth": 4.0})
+        assert framebuffer.array[1, 2].tolist() == [10, 20, 30]
+        assert framebuffer.depth[1, 2] == 4.0
+        assert not target.any()
+    finally:
+        framebuffer.close()
+
+
+def test_commit_copies_tiles_into_the_callers_buffer(target):
+    framebuffer = FrameBuffer(SIZE, target)
+    try:
+        framebuffer.shared_view().array[:] = 7
+        framebuffer.commit(Tile(0, 0, 0, 4, 3))
+        assert np.shares_memory(framebuffer.image, target)
+        assert (target[:3, :4] == 7).all()
+        assert not target[3:].any() and not target[:, 4:].any()
+    finally:
+        framebuffer.close()
+
+
+def test_unpickled_frame_buffer_only_sees_the_shared_block(target):
+    framebuffer = FrameBuffer(SIZE, target)
+    try:
+        worker = pickle.loads(pickle.dumps(framebuffer))
+        assert worker.target is None and not worker._owner
+        worker.image[0, 0] = 9
+        assert framebuffer.array[0, 0].tolist() == [9, 9, 9]
+        assert not target.any()
+        worker.close()
+    finally:
+        framebuffer.close()
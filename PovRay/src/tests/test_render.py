@@ -0,0 +1,193 @@
+import mmap
+import multiprocessing
+import numpy as np
+import pytest
+from pathlib import Path
+from multiprocessing import shared_memory
+
+pytest.importorskip("gi")
+
+from povview.parser import Parser
+from povview.tracer import Tracer
+
+SCENES = Path(__file__).resolve().parents[2]
+SIZE = (64, 48)
+NBYTES = SIZE[0] * SIZE[1] * 3
+
+
+@pytest.fixture(scope="module")
+def robot():
+    return Parser().parse(str(SCENES / "robot.pov"))
+
+
+@pytest.fixture(scope="module")
+def sphere():
+    return Parser().parse(str(SCENES / "sphere.pov"))
+
+
+@pytest.fixture(scope="module")
+def area_sphere(tmp_path_factory):
+    scene = (SCENES / "sphere.pov").read_text()
+    scene = scene.replace(
+        "color rgb <1, 1, 1>",
+        "color rgb <1, 1, 1>\n    area_light <4, 0, 0>, <0, 0, 4>, 4, 4",
+        1,
+    )
+    path = tmp_path_factory.mktemp("scenes") / "area_sphere.pov"
+    path.write_text(scene)
+    return Parser().parse(str(path))
+
+
+def render(parsed_file, workers=2, **kwargs):
+    tracer = Tracer(
+        parsed_file["lights"],
+        parsed_file["cameras"][0],
+        parsed_file["objects"],
+        SIZE,
+        aa_samples=8,
+    )
+    tracer.trace_scene(workers=workers, **kwargs)
+    return np.asarray(tracer._img)
+
+
+@pytest.fixture(scope="module")
+def reference(robot):
+    return render(robot)
+
+
+def numpy_buffer():
+    return np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8), None
+
+
+def memoryview_buffer():
+    return memoryview(bytearray(NBYTES)), None
+
+
+def mmap_buffer():
+    buffer = mmap.mmap(-1, NBYTES)
+    return buffer, buffer.close
+
+
+def shared_memory_buffer():
+    buffer = shared_memory.SharedMemory(create=True, size=NBYTES)
+
+    def release():
+        buffer.close()
+        buffer.unlink()
+
+    return buffer, release
+
+
+@pytest.mark.parametrize(
+    "make_buffer",
+    [numpy_buffer, memoryview_buffer, mmap_buffer, shared_memory_buffer],
+)
+def test_anti_aliased_image_does_not_depend_on_the_buffer(
+    robot, reference, make_buffer
+):
+    buffer, release = make_buffer()
+    try:
+        image = render(robot, buffer=buffer)
+        pixels = (
+            buffer.buf if isinstance(buffer, shared_memory.SharedMemory) else buffer
+        )
+        written = np.frombuffer(pixels, dtype=np.uint8, count=NBYTES)
+
+        assert np.array_equal(image, reference)
+        assert np.array_equal(written.reshape(image.shape), reference)
+        del pixels, written
+    finally:
+        if release is not None:
+            release()
+
+
+@pytest.mark.parametrize("workers, tile_size", [(1, 32), (3, 8), (2, (24, 16))])
+def test_anti_aliased_image_does_not_depend_on_the_workers(
+    robot, reference, workers, tile_size
+):
+    image = render(robot, workers=workers, tile_size=tile_size)
+    assert np.array_equal(image, reference)
+
+
+def test_spawned_workers_render_the_same_image(robot, reference):
+    image = render(robot, mp_context=multiprocessing.get_context("spawn"))
+    assert np.array_equal(image, reference)
+
+
+def test_soft_shadows_are_jittered_the_same_way_on_every_worker(area_sphere):
+    tracer = Tracer(
+        area_sphere["lights"],
+        area_sphere["cameras"][0],
+        area_sphere["objects"],
+        SIZE,
+    )
+    xs, ys = np.arange(4), np.zeros(4, dtype=int)
+    light_u = tracer.light_samples(tracer.sample_rng(xs, ys))
+    assert light_u.shape == (4, 2 * 16)
+    assert len(np.unique(light_u, axis=0)) == 4
+
+    reference = render(area_sphere, workers=1, tile_size=32)
+    image = render(area_sphere, workers=3, tile_size=8)
+    assert np.array_equal(image, reference)
+
+
+def path_trace(parsed_file, tile_size, workers):
+    tracer = Tracer(
+        parsed_file["lights"],
+        parsed_file["cameras"][0],
+        parsed_file["objects"],
+        (40, 30),
+        model="path_tracer",
+        pass_samples=4,
+    )
+    tracer.trace_scene(tile_size=tile_size, workers=workers, sample_cap=64)
+    return tracer
+
+
+def test_adaptive_path_tracing_does_not_depend_on_the_tiles(sphere):
+    reference = path_trace(sphere, 8, 1)
+    assert reference.sample_counts.max() > 4
+
+    for tile_size, workers in [(16, 2), (32, 1), ((24, 8), 3)]:
+        tracer = path_trace(sphere, tile_size, workers)
+        assert np.array_equal(tracer.sample_counts, reference.sample_counts)
+        assert np.array_equal(tracer.radiance, reference.radiance)
+
+
+def test_only_the_requested_aovs_are_exposed(robot, sphere):
+    tracer = Tracer(
+        robot["lights"], robot["cameras"][0], robot["objects"], SIZE, aa_samples=8
+    )
+    tracer.trace_scene(workers=1)
+    assert tracer.aovs == {}
+
+    tracer.trace_scene(workers=1, aovs=("normal", "ids"))
+    assert sorted(tracer.aovs) == ["ids", "normal"]
+
+    tracer = Tracer(
+        sphere["lights"],
+        sphere["cameras"][0],
+        sphere["objects"],
+        (40, 30),
+        model="path_tracer",
+        pass_samples=2,
+    )
+    tracer.trace_scene(workers=1, target_error=None, denoise=True)
+    assert tracer.aovs == {}
+    assert sorted(tracer.denoise_guides) == ["albedo", "depth", "normal"]
+
+
+def test_worker_payload_leaves_previous_renders_behind(sphere):
+    tracer = Tracer(
+        sphere["lights"],
+        sphere["cameras"][0],
+        sphere["objects"],
+        (40, 30),
+        model="path_tracer",
+        pass_samples=2,
+    )
+    size = len(tracer.worker_payload())
+    tracer.trace_scene(workers=1, target_error=None, denoise=True, aovs=("normal",))
+    assert tracer.radiance is not None and tracer.aovs
+
+    assert len(tracer.worker_payload()) == size
@@ -0,0 +1,16 @@
+import numpy as np
+
+from povview.math.rng import CounterRNG
+
+
+def test_counter_rng_does_not_depend_on_the_batch():
+    pixels, samples = np.arange(64) % 16, np.arange(64) // 16
+    whole = CounterRNG(7, pixels, samples).uniform(None, 2, 3, 4)
+
+    order = np.random.default_rng(0).permutation(64)
+    shuffled = CounterRNG(7, pixels[order], samples[order]).uniform(None, 2, 3, 4)
+    part = CounterRNG(7, pixels[:10], samples[:10]).uniform(None, 2, 3, 4)
+
+    np.testing.assert_array_equal(shuffled, whole[order])
+    np.testing.assert_array_equal(part, whole[:10])
+    assert ((whole >= 0) & (whole < 1)).all()
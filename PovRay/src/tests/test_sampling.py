@@ -0,0 +1,19 @@
+import numpy as np
+
+from povview.math.sampling import cosine_hemisphere, orthonormal_basis
+
+
+def test_cosine_hemisphere_stays_around_the_normals():
+    rng = np.random.default_rng(1)
+    normals = rng.normal(size=(1000, 3))
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+
+    tangents, bitangents = orthonormal_basis(normals)
+    np.testing.assert_allclose(np.einsum("ij,ij->i", tangents, normals), 0, atol=1e-12)
+    np.testing.assert_allclose(np.cross(tangents, bitangents), normals, atol=1e-12)
+
+    directions, pdfs = cosine_hemisphere(normals, rng.random((1000, 2)))
+    cosines = np.einsum("ij,ij->i", directions, normals)
+    np.testing.assert_allclose(np.linalg.norm(directions, axis=1), 1)
+    assert (cosines >= 0).all()
+    np.testing.assert_allclose(pdfs, cosines / np.pi)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from povview.math.sequences import SobolSampler, sobol_2d
+
+
+def test_sobol_points_form_a_net():
+    points = sobol_2d(np.arange(64, dtype=np.uint32)) * 2.0**-32
+
+    # One point in each of the 64 elementary intervals of every shape
+    for log_x in range(7):
+        cells_x, cells_y = 2**log_x, 2 ** (6 - log_x)
+        cells = (points[:, 0] * cells_x).astype(int) * cells_y + (
+            points[:, 1] * cells_y
+        ).astype(int)
+        assert len(np.unique(cells)) == 64
+
+
+def test_scrambled_sobol_keeps_the_stratification_of_every_pixel():
+    pixels = np.repeat(np.arange(4), 16)
+    samples = np.tile(np.arange(16), 4)
+    points = SobolSampler(3, pixels, samples).uniform(None, 1, 2, 2)
+
+    assert ((points >= 0) & (points < 1)).all()
+    for pixel in range(4):
+        cells = (points[pixels == pixel] * 4).astype(int)
+        assert len(np.unique(cells[:, 0] * 4 + cells[:, 1])) == 16
@@ -1,5 +1,6 @@
 from povview.parser import Parser
 from povview.tracer import Tracer
+from povview.framebuffer import AOV_PLANES
 
 
 def main(args):
@@ -11,8 +12,14 @@ def main(args):
         (1920, 1080),
         model="ray_tracer" if not int(args[2]) else "path_tracer",
     )
-    tracer.trace_scene()
+    aovs = AOV_PLANES if len(args) > 4 and int(args[4]) else ()
+    result = tracer.trace_scene(
+        timeout=float(args[3]) if len(args) > 3 else None, aovs=aovs
+    )
     tracer.to_png(f"{tracer.model}.png")
+    if aovs:
+        tracer.save_aovs(f"{tracer.model}.png")
+    print(result)
 
 
 if __name__ == "__main__":